@@ -0,0 +1,55 @@
+"""unique monthly analytics key
+
+Revision ID: 1d08bc0d3381
+Revises: 9f8d1f7ed211
+Create Date: 2026-10-17 22:36:21.628631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d08bc0d3381'
+down_revision: Union[str, Sequence[str], None] = '9f8d1f7ed211'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest summary per (user_id, month) and drop rows
+    # without a key, so the unique constraint can be created
+    op.execute(
+        "DELETE FROM monthly_analytics "
+        "WHERE user_id IS NULL OR month IS NULL OR id NOT IN ("
+        "SELECT MAX(id) FROM monthly_analytics GROUP BY user_id, month)"
+    )
+
+    # Batch mode so SQLite (which can't ALTER constraints) recreates the table
+    with op.batch_alter_table('monthly_analytics') as batch_op:
+        batch_op.alter_column('user_id',
+               existing_type=sa.INTEGER(),
+               nullable=False)
+        batch_op.alter_column('month',
+               existing_type=sa.VARCHAR(),
+               nullable=False)
+        batch_op.create_unique_constraint('uq_user_monthly_analytics', ['user_id', 'month'])
+        batch_op.drop_index(op.f('ix_monthly_analytics_month'))
+        batch_op.drop_index(op.f('ix_monthly_analytics_user_id'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('monthly_analytics') as batch_op:
+        batch_op.create_index(op.f('ix_monthly_analytics_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(op.f('ix_monthly_analytics_month'), ['month'], unique=False)
+        batch_op.drop_constraint('uq_user_monthly_analytics', type_='unique')
+        batch_op.alter_column('month',
+               existing_type=sa.VARCHAR(),
+               nullable=True)
+        batch_op.alter_column('user_id',
+               existing_type=sa.INTEGER(),
+               nullable=True)
@@ -0,0 +1,323 @@
+from datetime import date, timedelta
+
+from sqlalchemy import Integer, cast, delete, extract, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.analytics import HALF_MONTH_DAY
+from app.models import DailyLog, MonthlyAnalytics, MonthlyLogAggregate
+
+METRICS = {
+    "work_hours": "work_hours",
+    "study_hours": "study_hours",
+    "sleep_hours": "sleep_hours",
+    "mood_score": "mood_score",
+    "goal_completed": "goal_completed_percentage",
+}
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def month_key(day) -> str:
+    # Not strftime("%Y"), which doesn't zero-pad years before 1000
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def month_bounds(month: str):
+    """
+    (first day, first day of the next month) for a YYYY-MM key, for
+    half-open date >= start AND date < end range filters.
+    """
+    start = date.fromisoformat(f"{month}-01")
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def month_keys(start, end):
+    """
+    YYYY-MM keys of every month that overlaps the dates start..end.
+    """
+    month = month_key(start)
+    last = month_key(end)
+    while month <= last:
+        yield month
+        month = month_key(month_bounds(month)[1])
+
+
+def previous_month_key(day) -> str:
+    return month_key(day.replace(day=1) - timedelta(days=1))
+
+
+def month_key_expr(dialect_name: str, column):
+    """
+    SQL expression rendering a date column as YYYY-MM.
+    """
+    if dialect_name == "sqlite":
+        return func.strftime("%Y-%m", column)
+    return func.to_char(column, "YYYY-MM")
+
+
+def log_increments(day, values: dict) -> dict:
+    """
+    Column increments contributed by one daily log.
+    values: DailyLogCreate-style dict keyed by DailyLog column names
+    """
+    work_hours = float(values["work_hours"])
+    first_half = day.day <= HALF_MONTH_DAY
+
+    increments = {"log_count": 1}
+    for metric, column in METRICS.items():
+        value = float(values[column])
+        increments[f"{metric}_sum"] = value
+        increments[f"{metric}_sq_sum"] = value * value
+
+    increments["first_half_count"] = 1 if first_half else 0
+    increments["first_half_work_hours_sum"] = work_hours if first_half else 0.0
+    increments["second_half_count"] = 0 if first_half else 1
+    increments["second_half_work_hours_sum"] = 0.0 if first_half else work_hours
+
+    return increments
+
+
+async def record_daily_log(db, user_id: int, day, values: dict):
+    """
+    Adds one daily log to the user's running monthly aggregate.
+    Does not commit, so it joins the caller's transaction.
+    """
+    await apply_increments(db, user_id, month_key(day), log_increments(day, values))
+
+
+async def record_daily_log_update(db, user_id: int, day, old_values: dict, new_values: dict):
+    """
+    Replaces one daily log's contribution to the monthly aggregate with
+    its edited values. Does not commit.
+    """
+    old = log_increments(day, old_values)
+    new = log_increments(day, new_values)
+    await apply_increments(
+        db, user_id, month_key(day), {column: new[column] - old[column] for column in new}
+    )
+
+
+async def record_daily_logs(db, user_id: int, rows):
+    """
+    Adds many daily logs (dicts with a "date" key) of one user, with one
+    upsert for all the months touched instead of one per log or month.
+    """
+    by_month = {}
+    for row in rows:
+        increments = log_increments(row["date"], row)
+        totals = by_month.setdefault(month_key(row["date"]), dict.fromkeys(increments, 0))
+        for column, value in increments.items():
+            totals[column] += value
+
+    await apply_monthly_increments(db, user_id, by_month)
+
+
+async def apply_increments(db, user_id: int, month: str, increments: dict):
+    await apply_monthly_increments(db, user_id, {month: increments})
+
+
+async def apply_monthly_increments(db, user_id: int, by_month: dict):
+    """
+    Adds {month: increments} to the user's monthly aggregates: one
+    multi-row upsert, plus one UPDATE dropping the stored partials of the
+    closed months among them.
+    """
+    if not by_month:
+        return
+    table = MonthlyLogAggregate.__table__
+
+    # Stored partials are only kept for closed months; a late write to one
+    # drops them so range queries read that month from daily_logs again
+    current = month_key(date.today())
+    closed = [month for month in by_month if month < current]
+    if closed:
+        await db.execute(
+            update(MonthlyAnalytics)
+            .where(MonthlyAnalytics.user_id == user_id, MonthlyAnalytics.month.in_(closed))
+            .values(partials=None)
+        )
+
+    insert_fn = UPSERT_DIALECTS.get(db.bind.dialect.name)
+
+    if insert_fn is not None:
+        # Month order, so concurrent imports lock rows in the same order
+        rows = [
+            {"user_id": user_id, "month": month, **increments}
+            for month, increments in sorted(by_month.items())
+        ]
+        stmt = insert_fn(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "month"],
+            set_={
+                column: table.c[column] + stmt.excluded[column]
+                for column in rows[0]
+                if column not in ("user_id", "month")
+            },
+        )
+        await db.execute(stmt)
+        return
+
+    # Generic fallback: per month, lock the row, then update or insert it
+    for month, increments in sorted(by_month.items()):
+        key = {"user_id": user_id, "month": month}
+        existing = (await db.execute(
+            select(MonthlyLogAggregate.id)
+            .filter_by(**key)
+            .with_for_update()
+        )).scalar()
+
+        if existing is None:
+            await db.execute(insert(table).values(**key, **increments))
+        else:
+            await db.execute(
+                update(table)
+                .where(table.c.id == existing)
+                .values({column: table.c[column] + value for column, value in increments.items()})
+            )
+
+
+async def get_monthly_aggregate(db, user_id: int, month: str):
+    return await db.scalar(
+        select(MonthlyLogAggregate).where(
+            MonthlyLogAggregate.user_id == user_id,
+            MonthlyLogAggregate.month == month
+        )
+    )
+
+
+def monthly_analytics_upsert(dialect_name: str, rows):
+    """
+    INSERT ... ON CONFLICT (user_id, month) DO UPDATE for monthly_analytics
+    rows, or None on dialects without an upsert. NULL values in rows don't
+    overwrite stored ones.
+    """
+    insert_fn = UPSERT_DIALECTS.get(dialect_name)
+    if insert_fn is None:
+        return None
+
+    table = MonthlyAnalytics.__table__
+    stmt = insert_fn(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "month"],
+        set_={
+            column: func.coalesce(stmt.excluded[column], table.c[column])
+            for column in rows[0]
+            if column not in ("user_id", "month")
+        },
+    )
+
+
+def partials_query(dialect_name: str, start, end, *filters):
+    """
+    Mergeable per-(user, month) partials of daily_logs in [start, end):
+    count, and count/sum/sum of squares/min/max of every metric.
+    """
+    month = month_key_expr(dialect_name, DailyLog.date)
+    columns = [DailyLog.user_id, month.label("month"), func.count().label("log_count")]
+
+    for metric, column in METRICS.items():
+        value = getattr(DailyLog, column)
+        columns += [
+            func.count(value).label(f"{metric}_count"),
+            func.sum(value).label(f"{metric}_sum"),
+            func.sum(value * value).label(f"{metric}_sq_sum"),
+            func.min(value).label(f"{metric}_min"),
+            func.max(value).label(f"{metric}_max"),
+        ]
+
+    return (
+        select(*columns)
+        .where(DailyLog.date >= start, DailyLog.date < end, *filters)
+        .group_by(DailyLog.user_id, month)
+    )
+
+
+def partials_from_row(row) -> dict:
+    """
+    JSON form of one partials_query() row, as stored in
+    MonthlyAnalytics.partials.
+    """
+    values = row._mapping
+
+    def number(value):
+        return None if value is None else float(value)
+
+    return {
+        "log_count": values["log_count"],
+        "metrics": {
+            metric: {
+                "count": values[f"{metric}_count"],
+                "sum": number(values[f"{metric}_sum"]) or 0.0,
+                "sq_sum": number(values[f"{metric}_sq_sum"]) or 0.0,
+                "min": number(values[f"{metric}_min"]),
+                "max": number(values[f"{metric}_max"]),
+            }
+            for metric in METRICS
+        },
+    }
+
+
+def rebuild_monthly_aggregates(db, user_id: int = None) -> int:
+    """
+    Recomputes monthly_log_aggregates from daily_logs with one
+    INSERT ... SELECT ... GROUP BY. Returns the number of rows written.
+    """
+    dialect_name = db.get_bind().dialect.name
+    month = month_key_expr(dialect_name, DailyLog.date)
+    first_half = cast(extract("day", DailyLog.date), Integer) <= HALF_MONTH_DAY
+
+    columns = {
+        "user_id": DailyLog.user_id,
+        "month": month,
+        "log_count": func.count(),
+    }
+    for metric, column in METRICS.items():
+        value = getattr(DailyLog, column)
+        columns[f"{metric}_sum"] = func.coalesce(func.sum(value), 0)
+        columns[f"{metric}_sq_sum"] = func.coalesce(func.sum(value * value), 0)
+
+    columns["first_half_count"] = func.count().filter(first_half)
+    columns["first_half_work_hours_sum"] = func.coalesce(
+        func.sum(DailyLog.work_hours).filter(first_half), 0
+    )
+    columns["second_half_count"] = func.count().filter(~first_half)
+    columns["second_half_work_hours_sum"] = func.coalesce(
+        func.sum(DailyLog.work_hours).filter(~first_half), 0
+    )
+
+    source = select(*[expr.label(name) for name, expr in columns.items()]).group_by(
+        DailyLog.user_id, month
+    )
+    clear = delete(MonthlyLogAggregate)
+
+    if user_id is not None:
+        source = source.where(DailyLog.user_id == user_id)
+        clear = clear.where(MonthlyLogAggregate.user_id == user_id)
+
+    db.execute(clear)
+    result = db.execute(
+        insert(MonthlyLogAggregate.__table__).from_select(list(columns), source)
+    )
+    db.commit()
+
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    # Backfill: python -m app.aggregates [user_id]
+    import sys
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        target = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        written = rebuild_monthly_aggregates(db, target)
+        print(f"[AGGREGATES] Rebuilt {written} monthly aggregates")
+    finally:
+        db.close()
@@ -1,11 +1,232 @@
-import pandas as pd
+import math
+from array import array
 from datetime import date
 
+# pandas/numpy are imported inside the batch functions only, so API and
+# Celery workers that never run batch analytics don't pay their import cost
+
+# Last day of the first half of a month. Every summary path compares the
+# work hours of days 1-15 with the rest of the month: unlike splitting the
+# logs at n // 2, that is a split the monthly running totals can maintain
+HALF_MONTH_DAY = 15
+
+
+def _as_float(value):
+    # SQL AVG() returns NULL where pandas would return NaN
+    return float("nan") if value is None else float(value)
+
+
+def _round2(value):
+    # Half-to-even on value * 100, i.e. what numpy's round() did on the
+    # DataFrame path, so stored summaries keep the same rounding
+    if math.isnan(value):
+        return value
+    return round(value * 100) / 100
+
+
+def _pairwise_sum(values, start, n):
+    # Same summation order as numpy's pairwise sum, so means come out
+    # bit-identical to the DataFrame path rather than just close
+    if n < 8:
+        total = 0.0
+        for i in range(start, start + n):
+            total += values[i]
+        return total
+
+    if n <= 128:
+        partial = [values[start + j] for j in range(8)]
+        blocked = n - n % 8
+        for i in range(start + 8, start + blocked, 8):
+            for j in range(8):
+                partial[j] += values[i + j]
+        total = ((partial[0] + partial[1]) + (partial[2] + partial[3])) + (
+            (partial[4] + partial[5]) + (partial[6] + partial[7])
+        )
+        for i in range(start + blocked, start + n):
+            total += values[i]
+        return total
+
+    half = n // 2
+    half -= half % 8
+    return _pairwise_sum(values, start, half) + _pairwise_sum(values, start + half, n - half)
+
+
+def _mean(values):
+    # NaN-skipping mean the way pandas does it: NaN counted as 0 in the sum
+    present = sum(1 for v in values if not math.isnan(v))
+    if not present:
+        return float("nan")
+    if present < len(values):
+        values = array("d", (0.0 if math.isnan(v) else v for v in values))
+    return _pairwise_sum(values, 0, len(values)) / present
+
+
+def work_trend(total_days_logged, first_half_work_hours, second_half_work_hours):
+    """
+    "improving" when days 16+ averaged more work hours than days 1-15.
+    Needs 7 logs and work hours in both halves of the month.
+    """
+    first = _as_float(first_half_work_hours)
+    second = _as_float(second_half_work_hours)
+    if total_days_logged < 7 or math.isnan(first) or math.isnan(second):
+        return "insufficient_data"
+    return "improving" if second > first else "declining"
+
+
 def generate_monthly_summary(daily_logs):
     """
-    daily_logs: list of dicts from DB
+    daily_logs: list of dicts from DB, with the log's date under "date"
+
+    Pure-Python implementation used by single-user paths; see
+    generate_monthly_summary_pandas for the DataFrame version.
     """
 
+    if not daily_logs:
+        return None
+
+    columns = {
+        key: array("d", (_as_float(log[key]) for log in daily_logs))
+        for key in ("work_hours", "study_hours", "sleep_hours", "goal_completed", "mood_score")
+    }
+    n = len(daily_logs)
+
+    summary = {
+        "avg_work_hours": _round2(_mean(columns["work_hours"])),
+        "avg_study_hours": _round2(_mean(columns["study_hours"])),
+        "avg_sleep_hours": _round2(_mean(columns["sleep_hours"])),
+        "goal_completion_rate": _round2(_mean(columns["goal_completed"]) * 100),
+        "avg_mood": _round2(_mean(columns["mood_score"])),
+        "total_days_logged": n
+    }
+
+    # Trend detection (simple & explainable)
+    work = columns["work_hours"]
+    first_half = [log["date"].day <= HALF_MONTH_DAY for log in daily_logs]
+    summary["work_trend"] = work_trend(
+        n,
+        _mean(array("d", (v for v, first in zip(work, first_half) if first))),
+        _mean(array("d", (v for v, first in zip(work, first_half) if not first))),
+    )
+
+    return summary
+
+
+# Input column -> output field of rolling_averages()
+ROLLING_FIELDS = {
+    "work_hours": "avg_work_hours",
+    "study_hours": "avg_study_hours",
+    "sleep_hours": "avg_sleep_hours",
+    "mood_score": "avg_mood",
+    "goal_completed": "avg_goal_completed",
+}
+
+
+def rolling_averages(days, columns, start, end, window):
+    """
+    Trailing `window`-day averages for every calendar day from start to
+    end, in one pass: each log is added to and removed from running sums
+    once, so the cost is O(logs + days) whatever the window size.
+
+    days: ascending dates of the logs (one log per date)
+    columns: ROLLING_FIELDS key -> values aligned with days (None = missing)
+    """
+    ordinals = [day.toordinal() for day in days]
+    sums = dict.fromkeys(columns, 0.0)
+    counts = dict.fromkeys(columns, 0)
+    head = tail = 0
+    points = []
+
+    for current in range(start.toordinal(), end.toordinal() + 1):
+        # Logs up to today enter the window...
+        while head < len(ordinals) and ordinals[head] <= current:
+            for key, values in columns.items():
+                if values[head] is not None:
+                    sums[key] += values[head]
+                    counts[key] += 1
+            head += 1
+
+        # ...and logs older than the window leave it
+        while tail < head and ordinals[tail] <= current - window:
+            for key, values in columns.items():
+                if values[tail] is not None:
+                    sums[key] -= values[tail]
+                    counts[key] -= 1
+                    if not counts[key]:
+                        sums[key] = 0.0  # drop accumulated rounding error
+            tail += 1
+
+        point = {"date": date.fromordinal(current), "days_logged": head - tail}
+        for key in columns:
+            point[ROLLING_FIELDS[key]] = (
+                _round2(sums[key] / counts[key]) if counts[key] else None
+            )
+        points.append(point)
+
+    return points
+
+
+def merge_partials(partials):
+    """
+    Combines partials (see aggregates.partials_from_row) of disjoint sets
+    of daily logs into the partials of their union. Returns None when
+    there is nothing to merge.
+    """
+    merged = None
+
+    for part in partials:
+        if merged is None:
+            merged = {
+                "log_count": part["log_count"],
+                "metrics": {metric: dict(stats) for metric, stats in part["metrics"].items()},
+            }
+            continue
+
+        merged["log_count"] += part["log_count"]
+        for metric, stats in part["metrics"].items():
+            into = merged["metrics"][metric]
+            into["count"] += stats["count"]
+            into["sum"] += stats["sum"]
+            into["sq_sum"] += stats["sq_sum"]
+            for bound, pick in (("min", min), ("max", max)):
+                if stats[bound] is not None:
+                    into[bound] = stats[bound] if into[bound] is None else pick(into[bound], stats[bound])
+
+    return merged
+
+
+def stats_from_partials(partials):
+    """
+    Average, population standard deviation, min and max of every metric.
+    """
+    stats = {}
+
+    for metric, part in partials["metrics"].items():
+        n = part["count"]
+        if not n:
+            stats[metric] = {"avg": None, "std": None, "min": None, "max": None}
+            continue
+
+        avg = part["sum"] / n
+        # max() guards against a tiny negative variance from rounding
+        variance = max(part["sq_sum"] / n - avg * avg, 0.0)
+        stats[metric] = {
+            "avg": _round2(avg),
+            "std": _round2(math.sqrt(variance)),
+            "min": part["min"],
+            "max": part["max"],
+        }
+
+    return stats
+
+
+def generate_monthly_summary_pandas(daily_logs):
+    """
+    daily_logs: list of dicts from DB, with the log's date under "date"
+
+    DataFrame implementation, kept as the reference for the batch kernel.
+    """
+    import pandas as pd
+
     df = pd.DataFrame(daily_logs)
 
     if df.empty:
@@ -21,16 +242,168 @@ def generate_monthly_summary(daily_logs):
     }
 
     # Trend detection (simple & explainable)
-    if len(df) >= 7:
-        first_half = df.iloc[:len(df)//2]
-        second_half = df.iloc[len(df)//2:]
-
-        summary["work_trend"] = (
-            "improving"
-            if second_half["work_hours"].mean() > first_half["work_hours"].mean()
-            else "declining"
-        )
-    else:
-        summary["work_trend"] = "insufficient_data"
+    first_half = pd.to_datetime(df["date"]).dt.day <= HALF_MONTH_DAY
+    summary["work_trend"] = work_trend(
+        len(df),
+        df.loc[first_half, "work_hours"].mean(),
+        df.loc[~first_half, "work_hours"].mean(),
+    )
+
+    return summary
+
+
+def summary_from_aggregates(
+    total_days_logged,
+    avg_work_hours,
+    avg_study_hours,
+    avg_sleep_hours,
+    avg_goal_completed,
+    avg_mood,
+    first_half_work_hours=None,
+    second_half_work_hours=None,
+):
+    """
+    Builds the same summary as generate_monthly_summary from values
+    that were already aggregated (e.g. by SQL GROUP BY).
+    """
+
+    if not total_days_logged:
+        return None
+
+    summary = {
+        "avg_work_hours": _round2(_as_float(avg_work_hours)),
+        "avg_study_hours": _round2(_as_float(avg_study_hours)),
+        "avg_sleep_hours": _round2(_as_float(avg_sleep_hours)),
+        "goal_completion_rate": _round2(_as_float(avg_goal_completed) * 100),
+        "avg_mood": _round2(_as_float(avg_mood)),
+        "total_days_logged": int(total_days_logged)
+    }
+
+    summary["work_trend"] = work_trend(
+        total_days_logged, first_half_work_hours, second_half_work_hours
+    )
 
     return summary
+
+
+def summary_from_monthly_aggregate(aggregate):
+    """
+    O(1) summary from a MonthlyLogAggregate row.
+    """
+
+    if aggregate is None or not aggregate.log_count:
+        return None
+
+    n = aggregate.log_count
+
+    def half_avg(total, count):
+        return total / count if count else None
+
+    return summary_from_aggregates(
+        n,
+        aggregate.work_hours_sum / n,
+        aggregate.study_hours_sum / n,
+        aggregate.sleep_hours_sum / n,
+        aggregate.goal_completed_sum / n,
+        aggregate.mood_score_sum / n,
+        half_avg(aggregate.first_half_work_hours_sum, aggregate.first_half_count),
+        half_avg(aggregate.second_half_work_hours_sum, aggregate.second_half_count),
+    )
+
+
+def _nanmean_rows(block):
+    """
+    Row-wise mean skipping NaN, summed the same way pandas' Series.mean
+    does (NaN filled with 0, numpy pairwise sum over each row), so results
+    are bit-identical to the per-user DataFrame path.
+    """
+    import numpy as np
+
+    missing = np.isnan(block)
+    if missing.any():
+        block = np.where(missing, 0.0, block)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return block.sum(axis=1) / (block.shape[1] - missing.sum(axis=1))
+
+
+def generate_monthly_summaries(
+    user_ids,
+    dates,
+    work_hours,
+    study_hours,
+    sleep_hours,
+    goal_completed,
+    mood_score,
+):
+    """
+    Batch version of generate_monthly_summary for many users at once.
+
+    Takes parallel column arrays (one element per daily log) and returns
+    {user_id: summary}. Each summary equals generate_monthly_summary_pandas()
+    called with that user's logs in date order.
+
+    Users are bucketed by number of logs, so every bucket is a dense
+    (users x days) matrix reduced with a handful of numpy calls.
+    """
+    import numpy as np
+
+    user_ids = np.asarray(user_ids)
+    if user_ids.size == 0:
+        return {}
+
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    order = np.lexsort((dates, user_ids))
+    user_ids = user_ids[order]
+    dates = dates[order]
+    first_half = (dates - dates.astype("datetime64[M]")).astype(np.int64) < HALF_MONTH_DAY
+    columns = {
+        name: np.asarray(values, dtype=np.float64)[order]
+        for name, values in (
+            ("work_hours", work_hours),
+            ("study_hours", study_hours),
+            ("sleep_hours", sleep_hours),
+            ("goal_completed", goal_completed),
+            ("mood_score", mood_score),
+        )
+    }
+
+    users, starts, counts = np.unique(
+        user_ids, return_index=True, return_counts=True
+    )
+
+    summaries = {}
+
+    for n in np.unique(counts):
+        n = int(n)
+        bucket = counts == n
+        rows = starts[bucket][:, None] + np.arange(n)
+
+        blocks = {name: column[rows] for name, column in columns.items()}
+        means = {name: _nanmean_rows(block) for name, block in blocks.items()}
+
+        work = blocks["work_hours"]
+        in_first = first_half[rows]
+        first_mean = _nanmean_rows(np.where(in_first, work, np.nan))
+        second_mean = _nanmean_rows(np.where(in_first, np.nan, work))
+        trends = np.full(len(rows), "insufficient_data")
+        if n >= 7:
+            known = ~(np.isnan(first_mean) | np.isnan(second_mean))
+            trends[known] = np.where(second_mean > first_mean, "improving", "declining")[known]
+
+        # np.round matches round() on the numpy scalars of the pandas path
+        rounded = {name: np.round(mean, 2).tolist() for name, mean in means.items()}
+        goal_rate = np.round(means["goal_completed"] * 100, 2).tolist()
+        trends = trends.tolist()
+
+        for i, user_id in enumerate(users[bucket].tolist()):
+            summaries[user_id] = {
+                "avg_work_hours": rounded["work_hours"][i],
+                "avg_study_hours": rounded["study_hours"][i],
+                "avg_sleep_hours": rounded["sleep_hours"][i],
+                "goal_completion_rate": goal_rate[i],
+                "avg_mood": rounded["mood_score"][i],
+                "total_days_logged": n,
+                "work_trend": trends[i],
+            }
+
+    return summaries
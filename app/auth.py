@@ -3,6 +3,7 @@ from jose import jwt
 from passlib.context import CryptContext
 from app.config import JWT_SECRET
 from hashlib import sha256
+from uuid import uuid4
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10
@@ -35,6 +36,7 @@ def create_refresh_token(user_id: int):
     payload = {
         "sub": str(user_id),
         "type": "refresh",
+        "jti": uuid4().hex,  # unique per token, so rotation never reissues the same hash
         "exp": expires_at
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
@@ -0,0 +1,217 @@
+from celery import chain, chord, group
+from sqlalchemy import func, select
+
+from app.celery_app import celery
+from app.config import (
+    BATCH_CHECKPOINT_TTL_SECONDS,
+    BATCH_MAX_CONCURRENT_SHARDS,
+    BATCH_SHARD_SIZE,
+)
+from app.database import SessionLocal
+from app.models import User
+from app.redis_client import get_redis
+
+# Failed attempts of one shard before the run gives up on it
+SHARD_MAX_RETRIES = 3
+SHARD_RETRY_SECONDS = 60
+
+
+class PerUserBatchJob:
+    """
+    A job that processes every user, split into user_id range shards.
+
+    process(db, lo, hi, **params) handles users with lo <= user_id < hi and
+    returns how many it processed. Shards run in max_concurrent_shards
+    lanes, each a Celery chain, so at most that many run at once; finished
+    shards are checkpointed in Redis per run, so re-running the same run_id
+    only processes the shards that did not finish.
+    """
+
+    def __init__(self, name, process, shard_size=BATCH_SHARD_SIZE,
+                 max_concurrent_shards=BATCH_MAX_CONCURRENT_SHARDS, on_complete=None):
+        self.name = name
+        self.process = process
+        self.shard_size = shard_size
+        self.max_concurrent_shards = max_concurrent_shards
+        self.on_complete = on_complete
+
+    def lanes(self, shards):
+        """
+        Deals shards round-robin into at most max_concurrent_shards lanes.
+        """
+        count = min(max(1, self.max_concurrent_shards), len(shards))
+        return [shards[i::count] for i in range(count)]
+
+    def plan(self, db):
+        """
+        [lo, hi) user_id ranges covering every user.
+        """
+        lo, hi = db.execute(select(func.min(User.id), func.max(User.id))).one()
+        if lo is None:
+            return []
+        return [
+            (start, min(start + self.shard_size, hi + 1))
+            for start in range(lo, hi + 1, self.shard_size)
+        ]
+
+
+# Job name -> PerUserBatchJob; shard tasks look their job up here
+jobs = {}
+
+
+def register_batch_job(name, process, **options):
+    job = PerUserBatchJob(name, process, **options)
+    jobs[name] = job
+    return job
+
+
+class RunProgress:
+    """
+    Redis-backed checkpoint and progress counters of one job run.
+    """
+
+    def __init__(self, job_name, run_id):
+        prefix = f"batch_job:{job_name}:{run_id}"
+        self.progress_key = f"{prefix}:progress"
+        self.done_key = f"{prefix}:done"
+        self.failures_key = f"{prefix}:failures"
+
+    def start(self, shards_total, restart=False):
+        client = get_redis()
+        pipe = client.pipeline()
+        if restart:
+            pipe.delete(self.progress_key, self.done_key)
+        # A new dispatch gives previously failed shards fresh retries
+        pipe.delete(self.failures_key)
+        pipe.hset(self.progress_key, "shards_total", shards_total)
+        pipe.hsetnx(self.progress_key, "shards_done", 0)
+        pipe.hsetnx(self.progress_key, "processed", 0)
+        pipe.hset(self.progress_key, "failed_shards", 0)
+        pipe.hset(self.progress_key, "status", "running")
+        pipe.expire(self.progress_key, BATCH_CHECKPOINT_TTL_SECONDS)
+        pipe.expire(self.done_key, BATCH_CHECKPOINT_TTL_SECONDS)
+        pipe.execute()
+
+    def done_shards(self):
+        return {int(shard) for shard in get_redis().smembers(self.done_key)}
+
+    def mark_done(self, shard, processed):
+        client = get_redis()
+        # SADD tells whether this shard was already counted, so a shard
+        # that runs twice doesn't inflate the totals
+        if client.sadd(self.done_key, shard):
+            pipe = client.pipeline()
+            pipe.hincrby(self.progress_key, "shards_done", 1)
+            pipe.hincrby(self.progress_key, "processed", processed)
+            pipe.expire(self.done_key, BATCH_CHECKPOINT_TTL_SECONDS)
+            pipe.execute()
+
+    def record_failure(self, shard):
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.hincrby(self.failures_key, shard, 1)
+        pipe.expire(self.failures_key, BATCH_CHECKPOINT_TTL_SECONDS)
+        failures, _ = pipe.execute()
+        if failures > SHARD_MAX_RETRIES:
+            client.hincrby(self.progress_key, "failed_shards", 1)
+        return failures
+
+    def finish(self):
+        """
+        Marks the run finished, or failed if any shard gave up. Returns the
+        final snapshot.
+        """
+        client = get_redis()
+        failed = int(client.hget(self.progress_key, "failed_shards") or 0)
+        client.hset(self.progress_key, "status", "failed" if failed else "finished")
+        return self.snapshot()
+
+    def snapshot(self):
+        values = {
+            key.decode(): value.decode()
+            for key, value in get_redis().hgetall(self.progress_key).items()
+        }
+        if not values:
+            return None
+        return {
+            key: value if key == "status" else int(value)
+            for key, value in values.items()
+        }
+
+
+def start_batch_job(name: str, run_id: str, restart: bool = False, **params):
+    """
+    Plans the shards of a run and dispatches the unfinished ones as a
+    chord over the job's lanes; restart=True discards the run's checkpoints
+    first. Returns the chord's AsyncResult (eager mode runs it inline).
+    """
+    job = jobs[name]
+    progress = RunProgress(name, run_id)
+
+    db = SessionLocal()
+    try:
+        shards = job.plan(db)
+    finally:
+        db.close()
+
+    progress.start(len(shards), restart)
+    done = progress.done_shards()
+    pending = [(lo, hi) for lo, hi in shards if lo not in done]
+
+    print(
+        f"[BATCH {name}] Run {run_id}: {len(pending)} of {len(shards)} shards to process"
+    )
+
+    # Each lane runs its shards one after another, so the job never has
+    # more than max_concurrent_shards in flight and nothing polls for a slot
+    lanes = group(
+        chain(run_shard.si(name, run_id, lo, hi, params) for lo, hi in lane)
+        for lane in job.lanes(pending)
+    )
+    return chord(lanes, finish_batch_job.s(name, run_id, params))()
+
+
+@celery.task(bind=True, max_retries=None)
+def run_shard(self, name, run_id, lo, hi, params):
+    """
+    Processes one user_id range of a batch job run. Failures retry only
+    this shard, up to SHARD_MAX_RETRIES times, and hold its lane until
+    then. A shard that still fails is counted in the run's failed_shards
+    and left unfinished, so its lane and the chord still complete and a
+    later dispatch of the run retries it.
+    """
+    job = jobs[name]
+    progress = RunProgress(name, run_id)
+
+    if lo in progress.done_shards():
+        return 0
+
+    db = SessionLocal()
+    try:
+        processed = job.process(db, lo, hi, **params)
+    except Exception as exc:
+        if progress.record_failure(lo) > SHARD_MAX_RETRIES:
+            print(f"[BATCH {name}] Run {run_id}: shard {lo}-{hi} failed: {exc}")
+            return 0
+        raise self.retry(exc=exc, countdown=SHARD_RETRY_SECONDS)
+    finally:
+        db.close()
+
+    progress.mark_done(lo, processed)
+    return processed
+
+
+@celery.task(ignore_result=True)
+def finish_batch_job(results, name, run_id, params):
+    job = jobs[name]
+    summary = RunProgress(name, run_id).finish()
+    if summary["failed_shards"]:
+        print(f"[BATCH {name}] Run {run_id}: {summary['failed_shards']} shards failed")
+
+    if job.on_complete is not None:
+        job.on_complete(run_id, summary, **params)
+    return summary
+
+
+def batch_job_progress(name: str, run_id: str):
+    return RunProgress(name, run_id).snapshot()
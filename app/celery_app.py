@@ -1,6 +1,16 @@
 from celery import Celery
 from celery.schedules import crontab
-from app.config import REDIS_URL
+from celery.signals import task_postrun, task_prerun
+from kombu import Queue
+from app.config import (
+    CELERY_MAX_TASKS_PER_CHILD,
+    CELERY_PREFETCH_MULTIPLIER,
+    CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    REDIS_URL,
+)
+from app.job_runs import finish_job_run, start_job_run
+from app.metrics import finish_task_metrics, start_task_metrics
+from app.profiling import finish_task_profile, start_task_profile
 
 celery = Celery(
     "personal_ai_tracker",
@@ -9,6 +19,43 @@ celery = Celery(
     include=["app.tasks"],  # auto-discover tasks
 )
 
+# Job-run ledger (see /admin/job-runs), per-task query records (N+1
+# reports) and opt-in profiles. The ledger row is written outside the
+# task's query record; the profile is finished first so it still sees it
+task_prerun.connect(start_job_run)
+task_prerun.connect(start_task_metrics)
+task_prerun.connect(start_task_profile)
+task_postrun.connect(finish_task_profile)
+task_postrun.connect(finish_task_metrics)
+task_postrun.connect(finish_job_run)
+
+# Queues: "batch" for scheduled and on-demand jobs that fan out over every
+# user, "default" for short latency-sensitive tasks, so a monthly run never
+# sits in front of them. Run one worker pool per queue (see commands.txt)
+celery.conf.task_queues = (Queue("default"), Queue("batch"))
+celery.conf.task_default_queue = "default"
+celery.conf.task_routes = {
+    "app.tasks.daily_job": {"queue": "batch"},
+    "app.tasks.monthly_job": {"queue": "batch"},
+    "app.tasks.backfill_monthly_analytics": {"queue": "batch"},
+    "app.tasks.backfill_daily_rollups": {"queue": "batch"},
+    "app.tasks.purge_expired_refresh_tokens": {"queue": "batch"},
+    "app.tasks.purge_notification_outbox": {"queue": "batch"},
+    "app.batch_jobs.run_shard": {"queue": "batch"},
+    "app.batch_jobs.finish_batch_job": {"queue": "batch"},
+}
+
+# Ack after the task finishes, so a worker dying mid-shard gets the message
+# redelivered instead of lost; tasks must be idempotent (batch shards skip
+# shards already done). A task that must not run twice opts out with
+# acks_late=False. One reserved message per process keeps long jobs from
+# holding messages another worker could start
+celery.conf.task_acks_late = True
+celery.conf.task_reject_on_worker_lost = True
+celery.conf.worker_prefetch_multiplier = CELERY_PREFETCH_MULTIPLIER
+celery.conf.broker_transport_options = {"visibility_timeout": CELERY_VISIBILITY_TIMEOUT_SECONDS}
+celery.conf.worker_max_tasks_per_child = CELERY_MAX_TASKS_PER_CHILD
+
 # Timezone
 celery.conf.timezone = "Asia/Kolkata"
 celery.conf.enable_utc = False
@@ -23,4 +70,16 @@ celery.conf.beat_schedule = {
         "task": "app.tasks.monthly_job",
         "schedule": crontab(day_of_month=1, hour=1, minute=0),  # 1st day 1:00 AM IST
     },
+    "purge-expired-refresh-tokens": {
+        "task": "app.tasks.purge_expired_refresh_tokens",
+        "schedule": crontab(hour=3, minute=30),  # Every day 3:30 AM IST
+    },
+    "send-notifications": {
+        "task": "app.tasks.send_notifications",
+        "schedule": crontab(minute="*/5"),  # Due retries, every 5 minutes
+    },
+    "purge-notification-outbox": {
+        "task": "app.tasks.purge_notification_outbox",
+        "schedule": crontab(hour=3, minute=45),  # Every day 3:45 AM IST
+    },
 }
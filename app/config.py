@@ -7,3 +7,91 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 JWT_SECRET = os.getenv("JWT_SECRET")
 REDIS_URL = os.getenv("REDIS_URL")
+
+# Async driver for the API; the sync DATABASE_URL stays for Celery and Alembic
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_database_url(url):
+    if not url or "://" not in url:
+        return url
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# user_id -> token_version cache in front of the per-request user lookup
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+# bcrypt runs in a dedicated process pool; requests beyond MAX_PENDING get 503
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 2)))
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", str(HASH_POOL_WORKERS * 8)))
+
+# SQLAlchemy pool settings. "api" sizes the async engine used by request
+# handlers, "worker" the sync engine used by Celery tasks.
+def _pool_profile(prefix, pool_size, max_overflow, pool_timeout):
+    return {
+        "pool_size": int(os.getenv(f"{prefix}_POOL_SIZE", str(pool_size))),
+        "max_overflow": int(os.getenv(f"{prefix}_MAX_OVERFLOW", str(max_overflow))),
+        "pool_timeout": float(os.getenv(f"{prefix}_POOL_TIMEOUT", str(pool_timeout))),
+        "pool_recycle": int(os.getenv(f"{prefix}_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv(f"{prefix}_POOL_PRE_PING", "true").lower() == "true",
+        "connect_timeout": int(os.getenv(f"{prefix}_CONNECT_TIMEOUT", "10")),
+    }
+
+
+DB_POOL_PROFILES = {
+    "api": _pool_profile("DB_API", pool_size=10, max_overflow=20, pool_timeout=5),
+    "worker": _pool_profile("DB_WORKER", pool_size=2, max_overflow=2, pool_timeout=30),
+}
+
+# Where refresh tokens live: "sql" (refresh_tokens table, purged by a
+# Celery task) or "redis" (keys with a TTL)
+REFRESH_TOKEN_BACKEND = os.getenv("REFRESH_TOKEN_BACKEND", "sql").lower()
+REFRESH_TOKEN_PURGE_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH_SIZE", "5000"))
+
+# Analytics responses cached in Redis per user and data version
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "3600"))
+
+# Per-user Celery jobs run as user_id range shards of BATCH_SHARD_SIZE;
+# finished shards are checkpointed in Redis for BATCH_CHECKPOINT_TTL_SECONDS
+BATCH_SHARD_SIZE = int(os.getenv("BATCH_SHARD_SIZE", "1000"))
+BATCH_MAX_CONCURRENT_SHARDS = int(os.getenv("BATCH_MAX_CONCURRENT_SHARDS", "4"))
+BATCH_CHECKPOINT_TTL_SECONDS = int(os.getenv("BATCH_CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Celery worker tuning. Batch tasks run for minutes, so workers reserve one
+# message at a time and ack it only when done; the Redis visibility timeout
+# must outlast the longest task or its message is delivered again
+CELERY_PREFETCH_MULTIPLIER = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1"))
+CELERY_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("CELERY_VISIBILITY_TIMEOUT_SECONDS", str(6 * 3600)))
+CELERY_MAX_TASKS_PER_CHILD = int(os.getenv("CELERY_MAX_TASKS_PER_CHILD", "100"))
+
+# Daily-log reminders go through the notification_outbox table. The sender
+# is "log" (prints) or "file" (appends JSON lines to NOTIFICATION_FILE);
+# failed sends are retried with exponential backoff up to
+# NOTIFICATION_MAX_ATTEMPTS times
+NOTIFICATION_SENDER = os.getenv("NOTIFICATION_SENDER", "log").lower()
+NOTIFICATION_FILE = os.getenv("NOTIFICATION_FILE", "notifications.jsonl")
+NOTIFICATION_SEND_BATCH_SIZE = int(os.getenv("NOTIFICATION_SEND_BATCH_SIZE", "500"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_SECONDS = int(os.getenv("NOTIFICATION_RETRY_SECONDS", "60"))
+# One send task stops after this long and queues a follow-up, so draining
+# a million reminders never holds a worker for the whole run
+NOTIFICATION_DRAIN_SECONDS = int(os.getenv("NOTIFICATION_DRAIN_SECONDS", "30"))
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "14"))
+NOTIFICATION_PURGE_BATCH_SIZE = int(os.getenv("NOTIFICATION_PURGE_BATCH_SIZE", "5000"))
+
+# Requests and Celery tasks running the same normalized SQL statement more
+# than this many times are reported as likely N+1 loops
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "10"))
+
+# Admin-requested sampling profiles (X-Profile header) and how long they
+# are kept in Redis
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_TTL_SECONDS = int(os.getenv("PROFILE_TTL_SECONDS", str(24 * 3600)))
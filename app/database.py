@@ -1,8 +1,22 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from app.config import ASYNC_DATABASE_URL, DATABASE_URL
+from app.db_pool import engine_options, instrument_engine
+from app.metrics import instrument_queries
 
-engine = create_engine(DATABASE_URL)
+# Sync engine: Celery tasks and Alembic
+engine = create_engine(DATABASE_URL, **engine_options("worker", DATABASE_URL))
+instrument_engine("worker", engine)
+instrument_queries("worker", engine)
 SessionLocal = sessionmaker(bind=engine)
 
+# Async engine: API request handlers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options("api", ASYNC_DATABASE_URL, is_async=True)
+)
+instrument_engine("api", async_engine.sync_engine)
+instrument_queries("api", async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
 Base = declarative_base()
@@ -0,0 +1,168 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import DB_POOL_PROFILES
+
+# Name of the connect-timeout argument per DBAPI driver
+CONNECT_TIMEOUT_ARGS = {
+    "psycopg2": "connect_timeout",
+    "asyncpg": "timeout",
+}
+
+
+class PoolStats:
+    """
+    Checkout/wait/overflow counters for one engine's pool, fed by pool
+    events and by the instrumented pool classes below.
+    """
+
+    def __init__(self, name, profile, engine):
+        self.name = name
+        self.profile = profile
+        self.engine = engine
+
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+
+        self._checked_out = 0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self._checked_out)
+            if isinstance(self.engine.pool, QueuePool):
+                self.peak_overflow = max(self.peak_overflow, self.engine.pool.overflow())
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checkins += 1
+            self._checked_out = max(self._checked_out - 1, 0)
+
+    def on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        pool = self.engine.pool
+        with self._lock:
+            stats = {
+                "profile": dict(self.profile),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total / self.waits * 1000, 3)
+                if self.waits else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 3),
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+
+# Engine name -> PoolStats; the pool finds its stats through its logging
+# name, which SQLAlchemy keeps when the pool is recreated on dispose()
+pool_stats = {}
+
+
+class _TimedGetMixin:
+    def _do_get(self):
+        stats = pool_stats.get(self._orig_logging_name)
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            if stats is not None:
+                stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if stats is not None:
+            stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(name: str, url: str, is_async: bool = False) -> dict:
+    """
+    create_engine()/create_async_engine() keyword arguments for a pool
+    profile from DB_POOL_PROFILES.
+    """
+    profile = DB_POOL_PROFILES[name]
+    options = {"pool_pre_ping": profile["pool_pre_ping"]}
+
+    # SQLite (tests, local dev) keeps SQLAlchemy's default pool
+    if url is None or make_url(url).get_backend_name() == "sqlite":
+        return options
+
+    options.update({
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": profile["pool_size"],
+        "max_overflow": profile["max_overflow"],
+        "pool_timeout": profile["pool_timeout"],
+        "pool_recycle": profile["pool_recycle"],
+    })
+
+    timeout_arg = CONNECT_TIMEOUT_ARGS.get(make_url(url).get_driver_name())
+    if timeout_arg:
+        options["connect_args"] = {timeout_arg: profile["connect_timeout"]}
+
+    return options
+
+
+def instrument_engine(name: str, engine):
+    """
+    Registers pool event listeners on a sync Engine (for async engines
+    pass async_engine.sync_engine).
+    """
+    stats = PoolStats(name, DB_POOL_PROFILES[name], engine)
+    pool_stats[name] = stats
+
+    event.listen(engine, "connect", stats.on_connect)
+    event.listen(engine, "checkout", stats.on_checkout)
+    event.listen(engine, "checkin", stats.on_checkin)
+    event.listen(engine, "invalidate", stats.on_invalidate)
+
+    return stats
@@ -1,60 +1,71 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import JWT_SECRET
 from app.db import get_db
+from app.metrics import track
 from app.models import User
+from app.token_cache import token_versions
 
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+    with track("auth"):
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
 
-        if payload.get("type") != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type"
-            )
+            if payload.get("type") != "access":
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token type"
+                )
+
+            user_id = payload.get("sub")
+            if user_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token"
+                )
+
+            return {
+                "user_id": int(payload["sub"]),
+                "role": payload["role"]
+            }
 
-        user_id = payload.get("sub")
-        if user_id is None:
+        except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
+                detail="Invalid or expired token"
             )
-
-        return {
-            "user_id": int(payload["sub"]),
-            "role": payload["role"]
-        }
-
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
     
-def get_current_user_id(
+async def get_current_user_id(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        user_id = int(payload["sub"])
-        token_version = payload["tv"]
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    with track("auth"):
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+            user_id = int(payload["sub"])
+            token_version = payload["tv"]
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        current_version, generation = token_versions.get(user_id)
+
+        if current_version is None:
+            user = await db.get(User, user_id)
+            current_version = user.token_version if user else None
 
-    user = db.query(User).get(user_id)
+            if current_version is not None:
+                token_versions.set(user_id, current_version, generation)
 
-    if not user or user.token_version != token_version:
-        raise HTTPException(status_code=401, detail="Token expired")
+        if current_version is None or current_version != token_version:
+            raise HTTPException(status_code=401, detail="Token expired")
 
-    return user.id
+        return user_id
 
 
 def require_role(required_role: str):
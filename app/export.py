@@ -0,0 +1,113 @@
+import csv
+import io
+import zlib
+
+import orjson
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import DailyLog
+
+# Same columns the /daily-logs/import endpoint accepts, so exports round-trip
+EXPORT_COLUMNS = [
+    "date",
+    "work_hours",
+    "study_hours",
+    "sleep_hours",
+    "mood_score",
+    "goal_completed_percentage",
+    "notes",
+]
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 1000
+
+# Output is buffered up to this many bytes before it is sent
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_query(user_id: int, date_from=None, date_to=None):
+    stmt = (
+        select(*[getattr(DailyLog, column) for column in EXPORT_COLUMNS])
+        .where(DailyLog.user_id == user_id)
+        .order_by(DailyLog.date)
+    )
+    if date_from is not None:
+        stmt = stmt.where(DailyLog.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DailyLog.date <= date_to)
+    return stmt.execution_options(stream_results=True, yield_per=EXPORT_FETCH_SIZE)
+
+
+def _record(row):
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record["date"] = record["date"].isoformat()
+    if record["goal_completed_percentage"] is not None:
+        record["goal_completed_percentage"] = float(record["goal_completed_percentage"])
+    return record
+
+
+async def _lines(stmt, fmt: str):
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Own session: the response body is produced after the request
+    # handler (and its get_db session) has returned
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+
+        async for row in result:
+            if fmt == "csv":
+                record = _record(row)
+                writer.writerow([record[column] for column in EXPORT_COLUMNS])
+                if buffer.tell() >= EXPORT_FLUSH_BYTES:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+            else:
+                yield orjson.dumps(_record(row)) + b"\n"
+
+    if fmt == "csv":
+        yield buffer.getvalue().encode()
+
+
+async def export_daily_logs(user_id: int, fmt: str, date_from=None, date_to=None, gzip=False):
+    """
+    Yields the user's daily logs as CSV or NDJSON bytes, in date order,
+    straight from a server-side cursor so memory stays flat.
+    """
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31: gzip container
+    pending = []
+    size = 0
+    first = True
+
+    async for data in _lines(export_query(user_id, date_from, date_to), fmt):
+        if compressor is not None:
+            data = compressor.compress(data)
+            if first:
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        pending.append(data)
+        size += len(data)
+
+        # The first piece goes out at once, before the query has finished
+        if first or size >= EXPORT_FLUSH_BYTES:
+            first = False
+            yield b"".join(pending)
+            pending.clear()
+            size = 0
+
+    if compressor is not None:
+        pending.append(compressor.flush())
+    yield b"".join(pending)
@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.auth import hash_password, verify_password
+from app.config import HASH_POOL_MAX_PENDING, HASH_POOL_WORKERS
+
+# Suggested client back-off when the pool is saturated
+RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashingService:
+    """
+    Runs bcrypt in a process pool so hashing never holds the API worker's
+    GIL. At most `max_pending` calls may be queued or running; further
+    calls are rejected with 503 instead of piling up behind a login burst.
+
+    Pending counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, workers=HASH_POOL_WORKERS, max_pending=HASH_POOL_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a process that already runs threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication service busy, retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        start = time.perf_counter()
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._pool(), fn, *args
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool next call
+            self.failed += 1
+            self._executor = None
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+
+        elapsed = time.perf_counter() - start
+        self.completed += 1
+        self.latency_total += elapsed
+        self.latency_max = max(self.latency_max, elapsed)
+
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    def start(self):
+        """
+        Spawns the workers and imports bcrypt in each one up front, so the
+        first logins after a deploy don't pay process start-up time.
+        """
+        pool = self._pool()
+        for _ in range(self.workers):
+            pool.submit(hash_password, "warm-up")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queue_depth": self.pending,
+            "peak_queue_depth": self.peak_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.latency_total / self.completed * 1000, 2)
+            if self.completed else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 2),
+        }
+
+
+password_hasher = PasswordHashingService()
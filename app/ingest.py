@@ -0,0 +1,274 @@
+import codecs
+import csv
+import json
+from collections import deque
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from app.aggregates import UPSERT_DIALECTS, record_daily_logs
+from app.models import DailyLog
+from app.response_cache import bump_data_version
+from app.rollups import mark_rollup_dirty
+from app.schemas import DailyLogImport
+
+# Rows validated and written per INSERT / transaction
+IMPORT_CHUNK_SIZE = 1000
+
+# Physical lines one CSV record (quoted fields with line breaks) may span
+MAX_CSV_RECORD_LINES = 1000
+
+# Error messages returned to the client; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def detect_format(content_type: str, requested: str = None):
+    if requested:
+        return requested
+    return FORMATS.get((content_type or "").split(";")[0].strip().lower())
+
+
+async def iter_lines(chunks):
+    """
+    Decodes a byte stream incrementally (a character may span chunks) and
+    splits it into lines, keeping their endings, without buffering the body.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _in_quoted_field(line, quoted=False):
+    """
+    Whether a CSV record is still inside a quoted field after `line`, by
+    csv.reader's rules: a quote opens a quoted field only at the start of
+    a field; elsewhere it is a literal character. `quoted` is the state
+    the previous line of the record ended in.
+    """
+    if not quoted and '"' not in line:
+        return False
+
+    state = "quoted" if quoted else "start"
+    for char in line:
+        if state == "quoted":
+            if char == '"':
+                state = "quote"
+        elif state == "quote":
+            # "" is an escaped quote; anything else closes the field
+            state = "quoted" if char == '"' else "start" if char == "," else "field"
+        elif char == ",":
+            state = "start"
+        elif state == "start" and char == '"':
+            state = "quoted"
+        else:
+            state = "field"
+    return state == "quoted"
+
+
+class _LineFeed:
+    """
+    Source of a streaming csv.reader: lines are pushed in one complete
+    record at a time, so the reader never runs dry mid-record.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_records(lines, fmt: str):
+    """
+    Yields (record_number, dict | error message); records are numbered
+    from 1, not counting blank lines or the CSV header. NDJSON has one
+    record per line; CSV needs a header row naming the DailyLogImport
+    fields, and quoted fields may span lines.
+    """
+    number = 0
+
+    if fmt == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield number, f"invalid JSON: {exc}"
+                continue
+            yield number, record if isinstance(record, dict) else "expected a JSON object"
+        return
+
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header = None
+    record_lines = []
+    quoted = False
+
+    async for line in lines:
+        record_lines.append(line)
+        # A quoted field still open at the end of the line continues on
+        # the next one
+        quoted = _in_quoted_field(line, quoted)
+        if quoted:
+            if len(record_lines) < MAX_CSV_RECORD_LINES:
+                continue
+            number += 1
+            yield number, "unterminated quoted field"
+            record_lines.clear()
+            quoted = False
+            continue
+
+        feed.lines.extend(record_lines)
+        record_lines.clear()
+        try:
+            values = next(reader)
+        except csv.Error as exc:
+            # e.g. a bare carriage return in an unquoted field; drop what
+            # is left of the record so the next one starts clean
+            feed.lines.clear()
+            number += 1
+            yield number, f"invalid CSV: {exc}"
+            continue
+        if not values:
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        number += 1
+        if len(values) != len(header):
+            yield number, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield number, dict(zip(header, values))
+
+    if record_lines:
+        yield number + 1, "unterminated quoted field"
+
+
+class ImportResult:
+    def __init__(self):
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, number, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"record {number}: {message}")
+
+    def as_dict(self):
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+async def write_chunk(db, user_id: int, rows):
+    """
+    Inserts one chunk with a single multi-row INSERT ... ON CONFLICT DO
+    NOTHING on uq_user_daily_log, updates the monthly aggregates for the
+    rows that were actually inserted and commits. Returns that count.
+    """
+    insert_fn = UPSERT_DIALECTS.get(db.bind.dialect.name)
+    values = [{"user_id": user_id, **row} for row in rows]
+
+    if insert_fn is not None:
+        stmt = (
+            insert_fn(DailyLog)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["user_id", "date"])
+            .returning(DailyLog.date)
+        )
+        inserted_dates = set((await db.execute(stmt)).scalars())
+    else:
+        # No upsert: skip dates that already exist, then insert the rest
+        existing = set((await db.execute(
+            select(DailyLog.date).where(
+                DailyLog.user_id == user_id,
+                DailyLog.date.in_([row["date"] for row in rows])
+            )
+        )).scalars())
+        fresh = {}
+        for row in values:
+            if row["date"] not in existing:
+                fresh.setdefault(row["date"], row)
+        if fresh:
+            await db.execute(insert(DailyLog), list(fresh.values()))
+        inserted_dates = set(fresh)
+
+    # Duplicate dates inside one chunk: only the first occurrence was inserted
+    inserted = []
+    for row in rows:
+        if row["date"] in inserted_dates:
+            inserted.append(row)
+            inserted_dates.discard(row["date"])
+
+    await record_daily_logs(db, user_id, inserted)
+    await db.commit()
+
+    if inserted:
+        await bump_data_version(user_id)
+        await mark_rollup_dirty(row["date"] for row in inserted)
+
+    return len(inserted)
+
+
+async def import_daily_logs(db, user_id: int, chunks, fmt: str):
+    """
+    Streams, validates and writes daily logs in chunks of
+    IMPORT_CHUNK_SIZE, so memory stays flat however long the upload is.
+    """
+    result = ImportResult()
+    rows = []
+
+    async def flush():
+        written = await write_chunk(db, user_id, rows)
+        result.accepted += written
+        result.duplicates += len(rows) - written
+        rows.clear()
+
+    async for number, record in iter_records(iter_lines(chunks), fmt):
+        if isinstance(record, str):
+            result.reject(number, record)
+            continue
+
+        try:
+            rows.append(DailyLogImport.model_validate(record).model_dump())
+        except ValidationError as exc:
+            result.reject(number, "; ".join(
+                f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}"
+                for error in exc.errors()
+            ))
+            continue
+
+        if len(rows) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if rows:
+        await flush()
+
+    return result
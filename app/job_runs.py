@@ -0,0 +1,102 @@
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models import JobRun
+
+# Celery task state -> JobRun.status
+STATUSES = {
+    "SUCCESS": "succeeded",
+    "FAILURE": "failed",
+    "RETRY": "retry",
+}
+
+# Longest error message kept in the ledger
+MAX_ERROR_LENGTH = 2000
+
+# task_id -> (JobRun id, perf_counter at start) of the runs in progress in this process
+_running = {}
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def rows_and_failures(result):
+    """
+    Rows processed and failures reported by a task's return value: an int
+    is a row count; a dict may carry "processed" and "failed_shards" (the
+    batch job progress summary).
+    """
+    if isinstance(result, bool):
+        return None, 0
+    if isinstance(result, int):
+        return result, 0
+    if isinstance(result, dict):
+        processed = result.get("processed")
+        return (
+            processed if isinstance(processed, int) else None,
+            int(result.get("failed_shards") or 0),
+        )
+    return None, 0
+
+
+def start_job_run(task_id=None, task=None, **kwargs):
+    """
+    task_prerun handler: adds a "running" row for this execution.
+    """
+    request = task.request
+    delivery = getattr(request, "delivery_info", None) or {}
+
+    db = SessionLocal()
+    try:
+        run = JobRun(
+            task_name=task.name,
+            task_id=task_id,
+            queue=delivery.get("routing_key"),
+            worker=getattr(request, "hostname", None),
+            status="running",
+            started_at=_now(),
+            failures=0,
+        )
+        db.add(run)
+        db.flush()
+        _running[task_id] = (run.id, time.perf_counter())
+        db.commit()
+    except Exception as exc:
+        # The ledger must never fail the task itself
+        print(f"[JOB RUNS] Failed to record start of {task.name}: {exc}")
+    finally:
+        db.close()
+
+
+def finish_job_run(task_id=None, task=None, retval=None, state=None, **kwargs):
+    """
+    task_postrun handler: records duration, outcome and rows processed.
+    """
+    running = _running.pop(task_id, None)
+    if running is None:
+        return
+    run_id, started = running
+
+    values = {
+        "status": STATUSES.get(state, (state or "unknown").lower()),
+        "finished_at": _now(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    if isinstance(retval, BaseException):
+        values["error"] = f"{type(retval).__name__}: {retval}"[:MAX_ERROR_LENGTH]
+        values["failures"] = 1
+    else:
+        values["rows_processed"], values["failures"] = rows_and_failures(retval)
+
+    db = SessionLocal()
+    try:
+        db.execute(update(JobRun).where(JobRun.id == run_id).values(**values))
+        db.commit()
+    except Exception as exc:
+        print(f"[JOB RUNS] Failed to record end of {task.name}: {exc}")
+    finally:
+        db.close()
@@ -0,0 +1,364 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.config import QUERY_REPEAT_THRESHOLD
+
+# Request latency, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements executed by one request
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Route label of requests that matched no route, so 404 scans can't
+# create one series per URL
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetrics:
+    """
+    What one request spent outside Python: statements and time in the
+    database, and time in named phases (see track()).
+    """
+
+    __slots__ = ("queries", "db_seconds", "phases", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases = {}
+        # Statement text -> [executions, seconds]; normalized only when
+        # reported, so recording stays a dict lookup
+        self.statements = {}
+
+
+_current = ContextVar("request_metrics", default=None)
+
+
+def current_request_metrics():
+    return _current.get()
+
+
+# -------- repeated statements (N+1) --------
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|%s")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Statement shape with literals, bind parameters and IN lists replaced,
+    so one query run for many ids counts as one pattern.
+    """
+    shape = _LITERALS.sub("?", statement)
+    shape = _IN_LISTS.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def statement_patterns(record):
+    """
+    [(pattern, executions, seconds)] of a record, most executed first.
+    """
+    patterns = {}
+    for statement, (count, seconds) in record.statements.items():
+        entry = patterns.setdefault(normalize_sql(statement), [0, 0.0])
+        entry[0] += count
+        entry[1] += seconds
+    return sorted(
+        ((pattern, count, seconds) for pattern, (count, seconds) in patterns.items()),
+        key=lambda item: (-item[1], -item[2]),
+    )
+
+
+def repeated_statements(record, threshold=QUERY_REPEAT_THRESHOLD):
+    return [item for item in statement_patterns(record) if item[1] > threshold]
+
+
+def report_repeated_statements(target: str, record):
+    """
+    Logs the statements `target` (a route or task) repeated more than
+    QUERY_REPEAT_THRESHOLD times. Returns them.
+    """
+    # Cheap pre-check: without enough queries nothing can repeat
+    if record.queries <= QUERY_REPEAT_THRESHOLD:
+        return []
+    repeated = repeated_statements(record)
+    for pattern, count, seconds in repeated:
+        print(
+            f"[N+1] {target}: statement ran {count} times "
+            f"({seconds * 1000:.1f}ms): {pattern[:300]}"
+        )
+    return repeated
+
+
+@contextmanager
+def track(phase: str):
+    """
+    Adds the time spent in the block to the current request's `phase`.
+    Outside a request this only times the block.
+    """
+    record = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if record is not None:
+            record.phases[phase] = record.phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; observe() is one bisect and a few additions
+    under a lock.
+    """
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.label_names, labels, [le])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics of this API worker. Each uvicorn worker process
+    keeps its own; Prometheus sums them across scrape targets.
+    """
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Request latency by route template and status.",
+            ("method", "route", "status"),
+        )
+        self.request_queries = Histogram(
+            "http_request_db_queries",
+            "SQL statements executed per request.",
+            ("method", "route"),
+            buckets=QUERY_BUCKETS,
+        )
+        self.request_db_time = Histogram(
+            "http_request_db_seconds",
+            "Time per request spent executing SQL statements.",
+            ("method", "route"),
+        )
+        self.request_phase_time = Counter(
+            "http_request_phase_seconds_total",
+            "Time spent in named request phases (e.g. auth).",
+            ("method", "route", "phase"),
+        )
+        self.db_queries = Counter(
+            "db_queries_total", "SQL statements executed.", ("engine",)
+        )
+        self.db_time = Counter(
+            "db_query_seconds_total", "Time spent executing SQL statements.", ("engine",)
+        )
+        self.repeated_queries = Counter(
+            "http_request_repeated_queries_total",
+            "Requests that ran one statement more than QUERY_REPEAT_THRESHOLD times.",
+            ("method", "route"),
+        )
+
+    def observe_request(self, method, route, status, seconds, record):
+        self.request_duration.observe(seconds, (method, route, str(status)))
+        self.request_queries.observe(record.queries, (method, route))
+        self.request_db_time.observe(record.db_seconds, (method, route))
+        for phase, phase_seconds in record.phases.items():
+            self.request_phase_time.inc((method, route, phase), phase_seconds)
+        if report_repeated_statements(f"{method} {route}", record):
+            self.repeated_queries.inc((method, route))
+
+    def render(self) -> str:
+        from app.db_pool import pool_stats
+
+        lines = []
+        for metric in (
+            self.request_duration,
+            self.request_queries,
+            self.request_db_time,
+            self.request_phase_time,
+            self.db_queries,
+            self.db_time,
+            self.repeated_queries,
+        ):
+            lines.extend(metric.render())
+
+        pools = {name: stats.snapshot() for name, stats in pool_stats.items()}
+        for key, kind, help_text in (
+            ("checkouts", "counter", "Connections checked out of the pool."),
+            ("timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+            ("checked_out", "gauge", "Connections currently checked out."),
+        ):
+            name = f"db_pool_{key}" + ("_total" if kind == "counter" else "")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for pool, stats in sorted(pools.items()):
+                if key in stats:
+                    lines.append(f'{name}{{pool="{_escape(pool)}"}} {stats[key]}')
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware, which adds a task per
+    request). Times each HTTP request and labels it with the matched route
+    template, so /daily-logs/{day} is one series for every date.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        record = RequestMetrics()
+        token = _current.set(record)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                elapsed,
+                record,
+            )
+
+
+def instrument_queries(name: str, engine):
+    """
+    Counts statements and their time on a sync Engine (for async engines
+    pass async_engine.sync_engine), per engine and for the current request.
+    """
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        metrics.db_queries.inc((name,))
+        metrics.db_time.inc((name,), elapsed)
+
+        record = _current.get()
+        if record is not None:
+            record.queries += 1
+            record.db_seconds += elapsed
+            entry = record.statements.get(statement)
+            if entry is None:
+                record.statements[statement] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+# -------- Celery tasks --------
+
+# task_id -> contextvar token of the task's record
+_task_tokens = {}
+
+
+def start_task_metrics(task_id=None, **kwargs):
+    """
+    task_prerun handler: queries of the task count into its own record.
+    """
+    _task_tokens[task_id] = _current.set(RequestMetrics())
+
+
+def finish_task_metrics(task_id=None, task=None, **kwargs):
+    """
+    task_postrun handler: reports the task's repeated statements.
+    """
+    token = _task_tokens.pop(task_id, None)
+    if token is None:
+        return
+    record = _current.get()
+    _current.reset(token)
+    report_repeated_statements(f"task {task.name}", record)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Numeric, Date, Text,DateTime, ForeignKey, JSON,UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Numeric, Date, Text,DateTime, ForeignKey, JSON,UniqueConstraint, Index
 from app.database import Base
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,7 @@ class User(Base):
     password_hash = Column(String)
     role = Column(String, default="user")  # user | admin
     token_version = Column(Integer, default=1)
+    created_at = Column(DateTime)  # naive UTC; NULL for accounts older than the column
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete")
 
 class DailyLog(Base):
@@ -18,10 +19,22 @@ class DailyLog(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "date", name="uq_user_daily_log"),
+        # Keyset listing, duplicate checks and analytics reads are range
+        # scans on (user_id, date); on Postgres the metrics are included so
+        # they can be index-only scans
+        Index(
+            "ix_daily_logs_user_date_id", "user_id", "date", "id",
+            postgresql_include=[
+                "work_hours", "study_hours", "sleep_hours",
+                "mood_score", "goal_completed_percentage",
+            ],
+        ),
+        # Population-wide reads of one day (rollups)
+        Index("ix_daily_logs_date", "date"),
     )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, index=True)
+    user_id = Column(Integer)
     date = Column(Date)
 
     work_hours = Column(Float)
@@ -37,10 +50,139 @@ class DailyLog(Base):
 class MonthlyAnalytics(Base):
     __tablename__ = "monthly_analytics"
 
+    __table_args__ = (
+        # One summary per user and month; also the lookup index
+        UniqueConstraint("user_id", "month", name="uq_user_monthly_analytics"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    month = Column(String, nullable=False)  # YYYY-MM
+    # none_as_null: None is stored as SQL NULL, which upserts leave alone
+    summary = Column(JSON(none_as_null=True))
+    # Mergeable count/sum/sq_sum/min/max per metric (see
+    # aggregates.partials_from_row); NULL until computed for a closed month
+    partials = Column(JSON(none_as_null=True))
+
+class MonthlyLogAggregate(Base):
+    """
+    Running totals of a user's daily logs for one month, updated on every
+    daily-log write so summaries never need to rescan daily_logs.
+    """
+    __tablename__ = "monthly_log_aggregates"
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", name="uq_user_monthly_aggregate"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    month = Column(String, nullable=False)  # YYYY-MM
+
+    log_count = Column(Integer, nullable=False, default=0)
+
+    work_hours_sum = Column(Float, nullable=False, default=0)
+    work_hours_sq_sum = Column(Float, nullable=False, default=0)
+    study_hours_sum = Column(Float, nullable=False, default=0)
+    study_hours_sq_sum = Column(Float, nullable=False, default=0)
+    sleep_hours_sum = Column(Float, nullable=False, default=0)
+    sleep_hours_sq_sum = Column(Float, nullable=False, default=0)
+    mood_score_sum = Column(Float, nullable=False, default=0)
+    mood_score_sq_sum = Column(Float, nullable=False, default=0)
+    goal_completed_sum = Column(Float, nullable=False, default=0)
+    goal_completed_sq_sum = Column(Float, nullable=False, default=0)
+
+    # Half-month partials (days 1-15 / 16-end) for the work trend
+    first_half_count = Column(Integer, nullable=False, default=0)
+    first_half_work_hours_sum = Column(Float, nullable=False, default=0)
+    second_half_count = Column(Integer, nullable=False, default=0)
+    second_half_work_hours_sum = Column(Float, nullable=False, default=0)
+
+class DailyRollup(Base):
+    """
+    Population-wide statistics of one day of daily logs, refreshed by
+    daily_job so the admin dashboard never scans daily_logs.
+    """
+    __tablename__ = "daily_rollups"
+
+    __table_args__ = (
+        UniqueConstraint("day", name="uq_daily_rollup_day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+
+    active_users = Column(Integer, nullable=False, default=0)  # users who logged
+    registered_users = Column(Integer, nullable=False, default=0)
+
+    sleep_hours_count = Column(Integer, nullable=False, default=0)
+    sleep_hours_sum = Column(Float, nullable=False, default=0)
+    mood_score_count = Column(Integer, nullable=False, default=0)
+    mood_score_sum = Column(Float, nullable=False, default=0)
+    goal_completed_count = Column(Integer, nullable=False, default=0)
+    goal_completed_sum = Column(Float, nullable=False, default=0)
+
+    # Bucket counts, see rollups.HISTOGRAMS for the bucket bounds
+    sleep_hours_histogram = Column(JSON, nullable=False)
+    mood_score_histogram = Column(JSON, nullable=False)
+    goal_completed_histogram = Column(JSON, nullable=False)
+
+    refreshed_at = Column(DateTime, nullable=False)
+
+class JobRun(Base):
+    """
+    One execution of a Celery task: timing, outcome and rows processed,
+    written by the task signal handlers in app.job_runs.
+    """
+    __tablename__ = "job_runs"
+
+    __table_args__ = (
+        Index("ix_job_runs_task_started", "task_name", "started_at"),
+    )
+
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, index=True)
-    month = Column(String, index=True)
-    summary = Column(JSON)
+    task_name = Column(String, nullable=False)
+    task_id = Column(String, nullable=False)
+    queue = Column(String)
+    worker = Column(String)
+
+    status = Column(String, nullable=False)  # running | succeeded | failed | retry
+    started_at = Column(DateTime, nullable=False)  # naive UTC
+    finished_at = Column(DateTime)
+    duration_ms = Column(Float)
+
+    rows_processed = Column(Integer)
+    failures = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+
+class NotificationOutbox(Base):
+    """
+    Notifications waiting to be sent, or sent; written in bulk by batch jobs
+    and drained by the send_notifications task (see app.notifications).
+    """
+    __tablename__ = "notification_outbox"
+
+    __table_args__ = (
+        # One notification of a kind per user and day, so a shard that
+        # runs twice doesn't queue it twice
+        UniqueConstraint("user_id", "kind", "day", name="uq_notification_user_kind_day"),
+        # The sender's scan of due messages
+        Index("ix_notification_outbox_due", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    recipient = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # e.g. daily_log_missing
+    day = Column(Date, nullable=False)
+
+    status = Column(String, nullable=False, default="pending")  # pending | sent | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)  # naive UTC
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime)
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
@@ -48,6 +190,6 @@ class RefreshToken(Base):
     id = Column(Integer, primary_key=True)
     token_hash = Column(String, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)  # naive UTC
 
     user = relationship("User", back_populates="refresh_tokens")
\ No newline at end of file
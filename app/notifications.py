@@ -0,0 +1,225 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, insert, literal, select, update
+
+from app.config import (
+    NOTIFICATION_FILE,
+    NOTIFICATION_MAX_ATTEMPTS,
+    NOTIFICATION_RETRY_SECONDS,
+    NOTIFICATION_SENDER,
+)
+from app.models import DailyLog, NotificationOutbox, User
+
+# Reminder for users who did not log a day
+MISSING_LOG_KIND = "daily_log_missing"
+
+# Longest error message kept per message
+MAX_ERROR_LENGTH = 1000
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def queue_missing_log_reminders(db, lo, hi, day):
+    """
+    Queues a reminder for every user with lo <= id < hi who has no daily
+    log on `day` and no reminder for it yet. One INSERT ... SELECT with an
+    anti-join on (user_id, date), so no user ids pass through Python.
+    Returns the reminders queued.
+    """
+    now = _now()
+    missing = (
+        select(
+            User.id,
+            User.email,
+            literal(MISSING_LOG_KIND),
+            literal(day),
+            literal("pending"),
+            literal(0),
+            literal(now),
+            literal(now),
+        )
+        .outerjoin(DailyLog, and_(DailyLog.user_id == User.id, DailyLog.date == day))
+        .where(
+            User.id >= lo,
+            User.id < hi,
+            User.email.is_not(None),
+            DailyLog.id.is_(None),
+            ~select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.user_id == User.id,
+                NotificationOutbox.kind == MISSING_LOG_KIND,
+                NotificationOutbox.day == day,
+            )
+            .exists(),
+        )
+    )
+    result = db.execute(
+        insert(NotificationOutbox).from_select(
+            [
+                "user_id", "recipient", "kind", "day",
+                "status", "attempts", "next_attempt_at", "created_at",
+            ],
+            missing,
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def render(message):
+    """
+    Subject and body of an outbox message.
+    """
+    if message.kind == MISSING_LOG_KIND:
+        day = f"{message.day:%A, %B} {message.day.day}"
+        return (
+            "Don't forget your daily log",
+            f"You haven't logged {day} yet. Take a minute to add it and keep your streak going.",
+        )
+    raise ValueError(f"Unknown notification kind {message.kind!r}")
+
+
+# -------- senders --------
+# A sender delivers a batch of outbox messages and returns
+# {message id: error} for the ones that failed; raising fails the batch.
+
+class LogSender:
+    """
+    Prints every message; for development, until a real provider is set.
+    """
+
+    def send_batch(self, messages):
+        for message in messages:
+            subject, _ = render(message)
+            print(f"[NOTIFY] {message.recipient}: {subject}")
+        return {}
+
+
+class FileSender:
+    """
+    Appends every message to NOTIFICATION_FILE as a JSON line, one write
+    per batch; a local stand-in for an email provider.
+    """
+
+    def __init__(self, path=NOTIFICATION_FILE):
+        self.path = path
+
+    def send_batch(self, messages):
+        lines = []
+        for message in messages:
+            subject, body = render(message)
+            lines.append(json.dumps({
+                "id": message.id,
+                "to": message.recipient,
+                "kind": message.kind,
+                "subject": subject,
+                "body": body,
+            }) + "\n")
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(lines)
+        return {}
+
+
+SENDERS = {
+    "log": LogSender,
+    "file": FileSender,
+}
+
+if NOTIFICATION_SENDER not in SENDERS:
+    raise RuntimeError(
+        f"Unknown NOTIFICATION_SENDER {NOTIFICATION_SENDER!r}, "
+        f"expected one of {', '.join(SENDERS)}"
+    )
+
+notification_sender = SENDERS[NOTIFICATION_SENDER]()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Wait before the next attempt after `attempts` failed ones.
+    """
+    return timedelta(seconds=NOTIFICATION_RETRY_SECONDS * 2 ** (attempts - 1))
+
+
+def send_outbox_batch(db, sender, now, batch_size):
+    """
+    Sends up to batch_size due messages in one transaction and records the
+    outcome: sent, retried later with backoff, or dead after
+    NOTIFICATION_MAX_ATTEMPTS. Rows are locked with SKIP LOCKED where
+    supported, so concurrent senders take different messages.
+    Returns (sent, failed, fetched).
+    """
+    messages = db.execute(
+        select(
+            NotificationOutbox.id,
+            NotificationOutbox.user_id,
+            NotificationOutbox.recipient,
+            NotificationOutbox.kind,
+            NotificationOutbox.day,
+            NotificationOutbox.attempts,
+        )
+        .where(
+            NotificationOutbox.status == "pending",
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not messages:
+        db.commit()
+        return 0, 0, 0
+
+    try:
+        errors = sender.send_batch(messages)
+    except Exception as exc:
+        errors = {message.id: f"{type(exc).__name__}: {exc}" for message in messages}
+
+    sent_ids = [message.id for message in messages if message.id not in errors]
+    if sent_ids:
+        db.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(sent_ids))
+            .values(status="sent", sent_at=now)
+        )
+
+    failed = []
+    for message in messages:
+        if message.id not in errors:
+            continue
+        attempts = message.attempts + 1
+        failed.append({
+            "id": message.id,
+            "attempts": attempts,
+            "status": "dead" if attempts >= NOTIFICATION_MAX_ATTEMPTS else "pending",
+            "next_attempt_at": now + retry_delay(attempts),
+            "last_error": str(errors[message.id])[:MAX_ERROR_LENGTH],
+        })
+    if failed:
+        # Bulk UPDATE by primary key, one executemany
+        db.execute(update(NotificationOutbox), failed)
+
+    db.commit()
+    return len(sent_ids), len(failed), len(messages)
+
+
+def purge_outbox_batch(db, before, batch_size):
+    """
+    Deletes up to batch_size sent or dead messages created before `before`.
+    Returns the number of rows deleted.
+    """
+    old = (
+        select(NotificationOutbox.id)
+        .where(
+            NotificationOutbox.status.in_(("sent", "dead")),
+            NotificationOutbox.created_at < before,
+        )
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(old)))
+    db.commit()
+    return result.rowcount
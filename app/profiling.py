@@ -0,0 +1,213 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import PROFILE_SAMPLE_INTERVAL_MS, PROFILE_TTL_SECONDS
+from app.metrics import current_request_metrics, statement_patterns
+from app.redis_client import get_redis
+
+# Request header that asks for a profile of that request (admins only)
+PROFILE_HEADER = b"x-profile"
+# Response header carrying the id to fetch the profile with
+PROFILE_ID_HEADER = b"x-profile-id"
+
+PROFILE_KEY = "profile:{profile_id}"
+
+# Statement patterns kept with a profile
+PROFILE_STATEMENTS = 20
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack every `interval` seconds from a background
+    thread and counts identical stacks. Costs nothing to the profiled code
+    beyond the sampler briefly holding the GIL.
+
+    Profiling the event loop thread also samples whatever else the loop
+    runs meanwhile, e.g. other requests.
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = {}
+        self.started_at = None
+        self.duration = 0.0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def folded(self) -> str:
+        """
+        Collapsed stacks ("root;...;leaf count" per line), as read by
+        flamegraph.pl, speedscope and inferno.
+        """
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.samples.items(), key=lambda item: -item[1])
+        )
+
+
+def _profile_document(target, profiler, record):
+    document = {
+        "target": target,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(profiler.duration * 1000, 3),
+        "interval_ms": profiler.interval * 1000,
+        "samples": sum(profiler.samples.values()),
+        "folded": profiler.folded(),
+    }
+    if record is not None:
+        document["queries"] = record.queries
+        document["db_ms"] = round(record.db_seconds * 1000, 3)
+        document["statements"] = [
+            {"statement": pattern, "count": count, "ms": round(seconds * 1000, 3)}
+            for pattern, count, seconds in statement_patterns(record)[:PROFILE_STATEMENTS]
+        ]
+    return document
+
+
+def store_profile(profile_id, document):
+    try:
+        get_redis().setex(
+            PROFILE_KEY.format(profile_id=profile_id), PROFILE_TTL_SECONDS, json.dumps(document)
+        )
+    except Exception as exc:
+        print(f"[PROFILE] Failed to store profile {profile_id}: {exc}")
+
+
+def load_profile(profile_id):
+    document = get_redis().get(PROFILE_KEY.format(profile_id=profile_id))
+    return json.loads(document) if document is not None else None
+
+
+def _is_admin(authorization: str) -> bool:
+    from app.dependencies import get_current_user, require_role
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        require_role("admin")(get_current_user(token))
+    except HTTPException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests that send `X-Profile: 1` with an admin token.
+    The profile is stored in Redis and its id returned in X-Profile-Id;
+    fetch it from /admin/profiles/{id}. Other requests pass straight
+    through after one header lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER, b"").lower() not in (b"1", b"true", b"yes"):
+            await self.app(scope, receive, send)
+            return
+
+        if not _is_admin(headers.get(b"authorization", b"").decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        profiler = SamplingProfiler().start()
+        record = current_request_metrics()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            target = f"{scope['method']} {scope['path']}"
+            document = _profile_document(target, profiler, record)
+            await run_in_threadpool(store_profile, profile_id, document)
+
+
+# -------- Celery tasks --------
+
+# task_id -> profiler of tasks sent with headers={"profile": True}
+_task_profilers = {}
+
+
+def _wants_profile(task) -> bool:
+    request = task.request
+    headers = getattr(request, "headers", None) or {}
+    return bool(getattr(request, "profile", None) or headers.get("profile"))
+
+
+def start_task_profile(task_id=None, task=None, **kwargs):
+    """
+    task_prerun handler; profiles tasks sent with headers={"profile": True}.
+    """
+    if _wants_profile(task):
+        _task_profilers[task_id] = SamplingProfiler().start()
+
+
+def finish_task_profile(task_id=None, task=None, **kwargs):
+    """
+    task_postrun handler; stores the profile under the task id.
+    """
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is None:
+        return
+    profiler.stop()
+    store_profile(task_id, _profile_document(f"task {task.name}", profiler, current_request_metrics()))
+    print(f"[PROFILE] task {task.name}: profile stored as {task_id}")
@@ -0,0 +1,23 @@
+import redis
+
+from app.config import REDIS_URL
+
+_client = None
+
+
+def get_redis():
+    """
+    Shared Redis client, created on first use.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL)
+    return _client
+
+
+def set_redis(client):
+    """
+    Replaces the shared client, e.g. with fakeredis.FakeRedis() in tests.
+    """
+    global _client
+    _client = client
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete
+
+from app.config import REFRESH_TOKEN_BACKEND
+from app.models import RefreshToken
+from app.redis_client import get_redis
+
+KEY_PREFIX = "refresh_token:"
+
+# KEYS[1] old token key, KEYS[2] new token key
+# ARGV[1] user id, ARGV[2] TTL of the new token in seconds
+# Consumes the old token and stores the new one in one step, so two
+# concurrent refreshes with the same token can't both succeed
+ROTATE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if not owner or owner ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SETEX', KEYS[2], ARGV[2], ARGV[1])
+return 1
+"""
+
+
+def _utc_naive(moment: datetime) -> datetime:
+    # refresh_tokens.expires_at is a naive UTC timestamp column
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _ttl_seconds(expires_at: datetime) -> int:
+    remaining = _utc_naive(expires_at) - _utc_naive(datetime.now(timezone.utc))
+    return max(int(remaining.total_seconds()), 1)
+
+
+class SQLRefreshTokenStore:
+    """
+    Refresh tokens as rows of refresh_tokens. Writes join the caller's
+    transaction; expired rows are removed by the purge_expired_refresh_tokens
+    Celery task.
+    """
+
+    name = "sql"
+
+    async def save(self, db, token_hash: str, user_id: int, expires_at: datetime):
+        db.add(RefreshToken(
+            token_hash=token_hash,
+            user_id=user_id,
+            expires_at=_utc_naive(expires_at)
+        ))
+
+    async def rotate(self, db, old_hash: str, new_hash: str, user_id: int, expires_at: datetime) -> bool:
+        # A single DELETE decides which of two concurrent refreshes wins
+        result = await db.execute(delete(RefreshToken).where(
+            RefreshToken.token_hash == old_hash,
+            RefreshToken.user_id == user_id,
+            RefreshToken.expires_at > _utc_naive(datetime.now(timezone.utc))
+        ))
+        if result.rowcount != 1:
+            return False
+
+        await self.save(db, new_hash, user_id, expires_at)
+        return True
+
+    async def revoke(self, db, token_hash: str):
+        await db.execute(delete(RefreshToken).where(
+            RefreshToken.token_hash == token_hash
+        ))
+
+
+class RedisRefreshTokenStore:
+    """
+    Refresh tokens as refresh_token:<hash> -> user_id keys with a TTL
+    matching the token's expiry, so Redis drops them on its own.
+    """
+
+    name = "redis"
+
+    def __init__(self):
+        self._rotate = None
+
+    def _key(self, token_hash: str) -> str:
+        return f"{KEY_PREFIX}{token_hash}"
+
+    def _rotate_script(self):
+        # Registered lazily: the Redis client may be swapped (set_redis)
+        # after import
+        client = get_redis()
+        if self._rotate is None or self._rotate.registered_client is not client:
+            self._rotate = client.register_script(ROTATE_SCRIPT)
+        return self._rotate
+
+    async def save(self, db, token_hash: str, user_id: int, expires_at: datetime):
+        await run_in_threadpool(
+            get_redis().setex, self._key(token_hash), _ttl_seconds(expires_at), str(user_id)
+        )
+
+    async def rotate(self, db, old_hash: str, new_hash: str, user_id: int, expires_at: datetime) -> bool:
+        rotated = await run_in_threadpool(
+            self._rotate_script(),
+            keys=[self._key(old_hash), self._key(new_hash)],
+            args=[str(user_id), _ttl_seconds(expires_at)],
+        )
+        return rotated == 1
+
+    async def revoke(self, db, token_hash: str):
+        await run_in_threadpool(get_redis().delete, self._key(token_hash))
+
+
+BACKENDS = {
+    "sql": SQLRefreshTokenStore,
+    "redis": RedisRefreshTokenStore,
+}
+
+if REFRESH_TOKEN_BACKEND not in BACKENDS:
+    raise RuntimeError(
+        f"Unknown REFRESH_TOKEN_BACKEND {REFRESH_TOKEN_BACKEND!r}, "
+        f"expected one of {', '.join(BACKENDS)}"
+    )
+
+refresh_tokens = BACKENDS[REFRESH_TOKEN_BACKEND]()
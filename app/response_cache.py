@@ -0,0 +1,128 @@
+import hashlib
+import time
+from functools import lru_cache
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+
+from app.config import ANALYTICS_CACHE_TTL_SECONDS
+from app.redis_client import get_redis
+
+DATA_VERSION_KEY = "data_version:{user_id}"
+CACHE_KEY = "response_cache:{user_id}:{scope}:v{version}"
+
+# Clients may keep the body but must revalidate it with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def _seed() -> int:
+    # A lost version key restarts above every version handed out before,
+    # so stale cache entries can never match again
+    return time.time_ns() // 1000
+
+
+def _data_version(user_id: int) -> int:
+    client = get_redis()
+    key = DATA_VERSION_KEY.format(user_id=user_id)
+    version = client.get(key)
+    if version is None:
+        client.set(key, _seed(), nx=True)
+        version = client.get(key)
+    return int(version)
+
+
+def _bump_data_version(user_id: int):
+    key = DATA_VERSION_KEY.format(user_id=user_id)
+    pipe = get_redis().pipeline()
+    pipe.set(key, _seed(), nx=True)
+    pipe.incr(key)
+    pipe.execute()
+
+
+def bump_data_versions(user_ids):
+    """
+    bump_data_version for many users in one round trip, for batch jobs
+    that rewrite stored analytics.
+    """
+    pipe = get_redis().pipeline()
+    for user_id in user_ids:
+        key = DATA_VERSION_KEY.format(user_id=user_id)
+        pipe.set(key, _seed(), nx=True)
+        pipe.incr(key)
+    try:
+        pipe.execute()
+    except Exception as exc:
+        print(f"[RESPONSE CACHE] Failed to bump data versions: {exc}")
+
+
+async def bump_data_version(user_id: int):
+    """
+    Marks every cached response of the user as stale. Call after a change
+    to the user's daily logs is committed.
+    """
+    try:
+        await run_in_threadpool(_bump_data_version, user_id)
+    except Exception as exc:
+        print(f"[RESPONSE CACHE] Failed to bump data version for user {user_id}: {exc}")
+
+
+def etag_for(key: str) -> str:
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+
+@lru_cache(maxsize=None)
+def _adapter(model):
+    return TypeAdapter(model)
+
+
+def render_json(content, model=None) -> bytes:
+    """
+    JSON bytes of `content`. With a Pydantic model the content is validated
+    and serialized by pydantic-core in one pass (NaN becomes null);
+    without one, orjson is used.
+    """
+    if model is not None:
+        adapter = _adapter(model)
+        return adapter.dump_json(adapter.validate_python(content), by_alias=True)
+    return orjson.dumps(jsonable_encoder(content))
+
+
+async def cached_json(request: Request, user_id: int, scope: str, compute, model=None):
+    """
+    Serves the JSON body produced by `await compute()` through a Redis cache
+    keyed on (user, scope, data version), with an ETag derived from that key.
+    `model` is the route's response model, used to serialize the body.
+
+    A matching If-None-Match is answered with 304 from Redis alone. Without
+    Redis, responses are computed every time and carry no ETag.
+    """
+    try:
+        version = await run_in_threadpool(_data_version, user_id)
+    except Exception as exc:
+        print(f"[RESPONSE CACHE] Redis unavailable, serving uncached: {exc}")
+        return Response(content=render_json(await compute(), model), media_type="application/json")
+
+    key = CACHE_KEY.format(user_id=user_id, scope=scope, version=version)
+    headers = {"ETag": etag_for(key), "Cache-Control": CACHE_CONTROL}
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    body = await run_in_threadpool(get_redis().get, key)
+
+    if body is None:
+        body = render_json(await compute(), model)
+        await run_in_threadpool(get_redis().setex, key, ANALYTICS_CACHE_TTL_SECONDS, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
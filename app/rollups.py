@@ -0,0 +1,290 @@
+from datetime import datetime, time, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, func, insert, or_, select
+
+from app.aggregates import UPSERT_DIALECTS
+from app.models import DailyLog, DailyRollup, User
+from app.redis_client import get_redis
+
+# Days whose logs changed after their rollup was computed
+DIRTY_DAYS_KEY = "rollup:dirty_days"
+
+# Metric -> (DailyLog column, lower bound of each histogram bucket). The
+# last bucket is open-ended; values below the first bound count in it.
+HISTOGRAMS = {
+    "sleep_hours": ("sleep_hours", list(range(0, 13))),
+    "mood_score": ("mood_score", list(range(1, 11))),
+    "goal_completed": ("goal_completed_percentage", list(range(0, 101, 10))),
+}
+
+PERCENTILES = (25, 50, 75, 90)
+
+
+def bucket_expr(column, bounds):
+    # CASE instead of floor(): portable, and clamps out-of-range values
+    return case(
+        (column.is_(None), None),
+        *[(column < bound, index) for index, bound in enumerate(bounds[1:])],
+        else_=len(bounds) - 1,
+    )
+
+
+def _empty_rollup(day, registered_users, now):
+    rollup = {
+        "day": day,
+        "active_users": 0,
+        "registered_users": registered_users,
+        "refreshed_at": now,
+    }
+    for metric, (_, bounds) in HISTOGRAMS.items():
+        rollup[f"{metric}_count"] = 0
+        rollup[f"{metric}_sum"] = 0.0
+        rollup[f"{metric}_histogram"] = [0] * len(bounds)
+    return rollup
+
+
+def registered_users_by_day(db, days):
+    """
+    day -> users registered by the end of that day, from one scan of
+    users, so backfilled days get the denominator they had at the time.
+    Users without created_at predate the column and count on every day.
+    """
+    counts = db.execute(
+        select(*[
+            func.count().filter(or_(
+                User.created_at.is_(None),
+                User.created_at < datetime.combine(day + timedelta(days=1), time.min),
+            ))
+            for day in days
+        ]).select_from(User)
+    ).one()
+    return dict(zip(days, counts))
+
+
+def compute_daily_rollups(db, days):
+    """
+    Rollup rows (dicts) for the given days from one GROUP BY over their
+    daily logs. Each group is one combination of histogram buckets, so
+    the result has at most a few thousand rows per day.
+    """
+    days = sorted(set(days))
+    if not days:
+        return []
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    registered_users = registered_users_by_day(db, days)
+    rollups = {day: _empty_rollup(day, registered_users[day], now) for day in days}
+
+    buckets = []
+    sums = []
+    for metric, (column, bounds) in HISTOGRAMS.items():
+        value = getattr(DailyLog, column)
+        buckets.append(bucket_expr(value, bounds).label(f"{metric}_bucket"))
+        sums.append(func.sum(value).label(f"{metric}_sum"))
+
+    stmt = (
+        select(DailyLog.date, *buckets, func.count().label("logs"), *sums)
+        .where(DailyLog.date.in_(days))
+        .group_by(DailyLog.date, *[bucket.name for bucket in buckets])
+    )
+
+    for row in db.execute(stmt):
+        values = row._mapping
+        rollup = rollups[row.date]
+        # One log per user and day, so logs == users who logged
+        rollup["active_users"] += values["logs"]
+
+        for metric in HISTOGRAMS:
+            bucket = values[f"{metric}_bucket"]
+            if bucket is None:
+                continue
+            rollup[f"{metric}_histogram"][bucket] += values["logs"]
+            rollup[f"{metric}_count"] += values["logs"]
+            rollup[f"{metric}_sum"] += float(values[f"{metric}_sum"])
+
+    return list(rollups.values())
+
+
+def refresh_daily_rollups(db, days):
+    """
+    Recomputes and stores the rollups of the given days. Returns them.
+    """
+    rollups = compute_daily_rollups(db, days)
+    if not rollups:
+        return rollups
+
+    insert_fn = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert_fn is not None:
+        stmt = insert_fn(DailyRollup).values(rollups)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["day"],
+            set_={column: stmt.excluded[column] for column in rollups[0] if column != "day"},
+        ))
+    else:
+        db.execute(delete(DailyRollup).where(DailyRollup.day.in_([r["day"] for r in rollups])))
+        db.execute(insert(DailyRollup), rollups)
+
+    db.commit()
+    return rollups
+
+
+# -------- dirty days --------
+
+async def mark_rollup_dirty(days):
+    """
+    Queues days whose logs changed for the next daily_job refresh.
+    """
+    days = {day.isoformat() for day in days}
+    if not days:
+        return
+    try:
+        await run_in_threadpool(get_redis().sadd, DIRTY_DAYS_KEY, *days)
+    except Exception as exc:
+        print(f"[ROLLUPS] Failed to mark days dirty: {exc}")
+
+
+def take_dirty_days():
+    """
+    Returns and clears the queued days in one MULTI/EXEC.
+    """
+    pipe = get_redis().pipeline()
+    pipe.smembers(DIRTY_DAYS_KEY)
+    pipe.delete(DIRTY_DAYS_KEY)
+    members, _ = pipe.execute()
+    return {datetime.fromisoformat(day.decode()).date() for day in members}
+
+
+def requeue_dirty_days(days):
+    if days:
+        get_redis().sadd(DIRTY_DAYS_KEY, *[day.isoformat() for day in days])
+
+
+def refresh_pending_rollups(db, today):
+    """
+    daily_job's incremental step: refreshes yesterday, today and every day
+    marked dirty since the last run. Returns the refreshed days.
+    """
+    days = take_dirty_days() | {today - timedelta(days=1), today}
+    try:
+        refresh_daily_rollups(db, days)
+    except Exception:
+        requeue_dirty_days(days)
+        raise
+    return sorted(days)
+
+
+# -------- dashboard --------
+
+def merge_histograms(histograms):
+    merged = None
+    for histogram in histograms:
+        merged = list(histogram) if merged is None else [a + b for a, b in zip(merged, histogram)]
+    return merged
+
+
+def histogram_percentiles(histogram, bounds):
+    """
+    Percentiles at bucket resolution: the lower bound of the bucket that
+    holds the p-th percentile value.
+    """
+    total = sum(histogram)
+    result = {}
+    for p in PERCENTILES:
+        if not total:
+            result[f"p{p}"] = None
+            continue
+        target = total * p / 100
+        running = 0
+        for count, bound in zip(histogram, bounds):
+            running += count
+            if running >= target:
+                result[f"p{p}"] = bound
+                break
+    return result
+
+
+def _change(current, previous):
+    if current is None or previous is None:
+        return None
+    if previous == 0:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def _period(rollups):
+    """
+    Averages of a set of days; everything is a sum over rollup rows.
+    """
+    days = len(rollups)
+    active = sum(r.active_users for r in rollups)
+    registered = sum(r.registered_users for r in rollups)
+    period = {
+        "days": days,
+        "avg_daily_active_users": round(active / days, 2) if days else None,
+        "logging_rate": round(active / registered, 4) if registered else None,
+    }
+    for metric in HISTOGRAMS:
+        count = sum(getattr(r, f"{metric}_count") for r in rollups)
+        total = sum(getattr(r, f"{metric}_sum") for r in rollups)
+        period[f"avg_{metric}"] = round(total / count, 2) if count else None
+    return period
+
+
+def build_dashboard(rollups, window_start, month_start, previous_month_start):
+    """
+    Dashboard payload from stored rollups (one row per day). The cost
+    depends on days x buckets only, never on the number of logs.
+
+    rollups: DailyRollup rows from min(window_start, previous_month_start)
+    up to today
+    """
+    window = [r for r in rollups if r.day >= window_start]
+    this_month = [r for r in rollups if r.day >= month_start]
+    # Same number of days into the previous month, for a fair comparison
+    days_into_month = len({r.day for r in this_month})
+    previous_month = [
+        r for r in rollups
+        if previous_month_start <= r.day < month_start
+        and (r.day - previous_month_start).days < days_into_month
+    ]
+
+    distributions = {}
+    for metric, (_, bounds) in HISTOGRAMS.items():
+        histogram = merge_histograms(getattr(r, f"{metric}_histogram") for r in window)
+        histogram = histogram or [0] * len(bounds)
+        distributions[metric] = {
+            "histogram": [
+                {"from": bound, "count": count} for bound, count in zip(bounds, histogram)
+            ],
+            **histogram_percentiles(histogram, bounds),
+        }
+
+    current = _period(this_month)
+    previous = _period(previous_month)
+
+    return {
+        "window": {
+            "from": window_start,
+            **_period(window),
+            "daily": [
+                {
+                    "date": r.day,
+                    "active_users": r.active_users,
+                    "logging_rate": round(r.active_users / r.registered_users, 4)
+                    if r.registered_users else None,
+                }
+                for r in window
+            ],
+        },
+        "distributions": distributions,
+        "month_over_month": {
+            "current": current,
+            "previous": previous,
+            "change_percent": {
+                key: _change(current[key], previous[key])
+                for key in current
+                if key != "days"
+            },
+        },
+        "refreshed_at": max((r.refreshed_at for r in rollups), default=None),
+    }
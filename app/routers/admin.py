@@ -1,8 +1,170 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.batch_jobs import batch_job_progress
+from app.db import get_db
 from app.dependencies import require_role
+from app.db_pool import pool_stats
+from app.hashing import password_hasher
+from app.metrics import metrics
+from app.profiling import load_profile
+from app.models import DailyRollup, JobRun
+from app.rollups import build_dashboard
+from app.schemas import JobRunPage, JobRunTaskSummary
+from app.token_cache import token_versions
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+MAX_DASHBOARD_DAYS = 366
+
+MAX_JOB_RUNS_PAGE_SIZE = 200
+
+
 @router.get("/dashboard")
-def dashboard(user=Depends(require_role("admin"))):
-    return {"message": "Welcome admin"}
+async def dashboard(
+    days: int = Query(30, ge=1, le=MAX_DASHBOARD_DAYS),
+    user=Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Fleet statistics from the daily rollups that daily_job refreshes; reads
+    one row per day, never the daily logs themselves.
+    """
+    today = date.today()
+    window_start = today - timedelta(days=days - 1)
+    month_start = today.replace(day=1)
+    previous_month_start = (month_start - timedelta(days=1)).replace(day=1)
+
+    rollups = (await db.scalars(
+        select(DailyRollup)
+        .where(
+            DailyRollup.day >= min(window_start, previous_month_start),
+            DailyRollup.day <= today,
+        )
+        .order_by(DailyRollup.day)
+    )).all()
+
+    return build_dashboard(rollups, window_start, month_start, previous_month_start)
+
+
+@router.get("/token-cache")
+def token_cache_stats(user=Depends(require_role("admin"))):
+    return token_versions.stats()
+
+
+@router.get("/hashing")
+def hashing_stats(user=Depends(require_role("admin"))):
+    return password_hasher.stats()
+
+
+@router.get("/db-pool")
+def db_pool_stats(user=Depends(require_role("admin"))):
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+
+@router.get("/batch-jobs/{name}/{run_id}")
+def batch_job_status(name: str, run_id: str, user=Depends(require_role("admin"))):
+    progress = batch_job_progress(name, run_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Unknown job run")
+    return progress
+
+
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(user=Depends(require_role("admin"))):
+    """
+    Per-route latency histograms, per-request SQL statement counts and DB
+    time, auth time and pool counters of this worker process.
+    """
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|folded)$"),
+    user=Depends(require_role("admin"))
+):
+    """
+    A profile recorded for a request sent with X-Profile: 1 (id from its
+    X-Profile-Id header) or for a Celery task sent with
+    headers={"profile": True} (id = task id). format=folded returns the
+    collapsed stacks for flamegraph.pl or speedscope.
+    """
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile")
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
+
+
+
+@router.get("/job-runs", response_model=JobRunPage)
+async def list_job_runs(
+    task: str = None,
+    status: str = Query(None, pattern="^(running|succeeded|failed|retry)$"),
+    limit: int = Query(50, ge=1, le=MAX_JOB_RUNS_PAGE_SIZE),
+    before_id: int = None,
+    user=Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Celery task executions, newest first. Pages continue from
+    `next_before_id`; task is the full task name, e.g. app.tasks.daily_job.
+    """
+    stmt = select(JobRun)
+    if task is not None:
+        stmt = stmt.where(JobRun.task_name == task)
+    if status is not None:
+        stmt = stmt.where(JobRun.status == status)
+    if before_id is not None:
+        stmt = stmt.where(JobRun.id < before_id)
+
+    runs = (await db.scalars(stmt.order_by(JobRun.id.desc()).limit(limit + 1))).all()
+
+    next_before_id = None
+    if len(runs) > limit:
+        runs = runs[:limit]
+        next_before_id = runs[-1].id
+
+    return {"items": runs, "next_before_id": next_before_id}
+
+
+@router.get("/job-runs/summary", response_model=list[JobRunTaskSummary])
+async def job_runs_summary(
+    days: int = Query(7, ge=1, le=MAX_DASHBOARD_DAYS),
+    user=Depends(require_role("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Per task over the last `days` days: runs, failed runs, duration and
+    rows processed. Retries count as runs of their own.
+    """
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+    rows = (await db.execute(
+        select(
+            JobRun.task_name,
+            func.count().label("runs"),
+            func.sum(case((JobRun.status == "failed", 1), else_=0)).label("failed"),
+            func.sum(case((JobRun.status == "running", 1), else_=0)).label("running"),
+            func.avg(JobRun.duration_ms).label("avg_duration_ms"),
+            func.max(JobRun.duration_ms).label("max_duration_ms"),
+            func.coalesce(func.sum(JobRun.rows_processed), 0).label("rows_processed"),
+            func.max(JobRun.started_at).label("last_started_at"),
+        )
+        .where(JobRun.started_at >= since)
+        .group_by(JobRun.task_name)
+        .order_by(JobRun.task_name)
+    )).all()
+
+    return [row._asdict() for row in rows]
@@ -1,73 +1,306 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
 
 from app.models import DailyLog, MonthlyAnalytics
-from app.analytics import generate_monthly_summary
+from app.aggregates import (
+    get_monthly_aggregate,
+    month_bounds,
+    month_key,
+    month_keys,
+    monthly_analytics_upsert,
+    partials_from_row,
+    partials_query,
+)
+from app.analytics import (
+    merge_partials,
+    rolling_averages,
+    stats_from_partials,
+    summary_from_monthly_aggregate,
+)
 from app.dependencies import get_current_user_id
 from app.db import get_db
-from app.schemas import MonthlyAnalyticsResponse
+from app.response_cache import cached_json
+from app.schemas import (
+    MonthAnalyticsResponse,
+    MonthlyAnalyticsResponse,
+    RangeAnalyticsResponse,
+    RollingAnalyticsResponse,
+)
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+MAX_ROLLING_WINDOW = 90
+MAX_ROLLING_RANGE_DAYS = 732
+DEFAULT_ROLLING_RANGE_DAYS = 30
+
+MAX_RANGE_DAYS = 3660
+# The month after `to` must still be a valid date (see month_bounds)
+MAX_RANGE_DATE = date(9999, 11, 30)
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+def _days_before(day, days):
+    """
+    `day` minus `days` days, clamped to date.min.
+    """
+    return date.fromordinal(max(day.toordinal() - days, 1))
+
+
+async def _log_partials(db, user_id: int, start, end):
+    """
+    Per-month partials of the user's daily logs in [start, end), computed
+    from daily_logs.
+    """
+    rows = await db.execute(
+        partials_query(db.bind.dialect.name, start, end, DailyLog.user_id == user_id)
+    )
+    return [partials_from_row(row) for row in rows]
+
 
 @router.get("/monthly", response_model=MonthlyAnalyticsResponse)
-def get_monthly_analytics(
+async def get_monthly_analytics(
+    request: Request,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     today = datetime.today()
     month_key = today.strftime("%Y-%m")
 
-    # Check if already generated
-    analytics = (
-        db.query(MonthlyAnalytics)
-        .filter(
-            MonthlyAnalytics.user_id == user_id,
-            MonthlyAnalytics.month == month_key
-        )
-        .first()
-    )
+    async def compute():
+        # Running totals maintained by create_daily_log
+        aggregate = await get_monthly_aggregate(db, user_id, month_key)
+        summary = summary_from_monthly_aggregate(aggregate)
+
+        if not summary:
+            raise HTTPException(status_code=400, detail="Not enough data")
+
+        row = {"user_id": user_id, "month": month_key, "summary": summary}
+
+        # Single upsert on uq_user_monthly_analytics, so concurrent first
+        # requests for the month can't race each other into a duplicate
+        stmt = monthly_analytics_upsert(db.bind.dialect.name, [row])
+        if stmt is not None:
+            await db.execute(stmt)
+        else:
+            analytics = await db.scalar(select(MonthlyAnalytics).filter_by(
+                user_id=user_id, month=month_key
+            ))
+            if analytics:
+                analytics.summary = summary
+            else:
+                db.add(MonthlyAnalytics(**row))
+        await db.commit()
 
-    if analytics:
         return {
             "month": month_key,
-            "summary": analytics.summary
+            "summary": summary
         }
 
-    # Fetch daily logs
-    logs = (
-        db.query(DailyLog)
-        .filter(DailyLog.user_id == user_id)
-        .all()
+    # Cached per data version: a new daily log changes the ETag, an
+    # unchanged one is answered with 304 without reading the database
+    return await cached_json(
+        request, user_id, f"monthly:{month_key}", compute, MonthlyAnalyticsResponse
     )
 
-    logs_data = [
-        {
-            "work_hours": l.work_hours,
-            "study_hours": l.study_hours,
-            "sleep_hours": l.sleep_hours,
-            "goal_completed": l.goal_completed_percentage,
-            "mood_score": l.mood_score,
-        }
-        for l in logs
-    ]
 
-    summary = generate_monthly_summary(logs_data)
+@router.get("/rolling", response_model=RollingAnalyticsResponse)
+async def get_rolling_analytics(
+    request: Request,
+    window: int = Query(7, ge=1, le=MAX_ROLLING_WINDOW),
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Trailing `window`-day averages for every day in [from, to]
+    (default: the last 30 days). Windows are calendar days; days without
+    a log are simply not counted.
+    """
+    date_to = date_to or datetime.today().date()
+    date_from = date_from or _days_before(date_to, DEFAULT_ROLLING_RANGE_DAYS - 1)
+
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if (date_to - date_from).days >= MAX_ROLLING_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {MAX_ROLLING_RANGE_DAYS} days"
+        )
+
+    async def compute():
+        # One range scan on (user_id, date), starting early enough to fill
+        # the first point's window
+        rows = (await db.execute(
+            select(
+                DailyLog.date,
+                DailyLog.work_hours,
+                DailyLog.study_hours,
+                DailyLog.sleep_hours,
+                DailyLog.mood_score,
+                DailyLog.goal_completed_percentage,
+            )
+            .where(
+                DailyLog.user_id == user_id,
+                DailyLog.date >= _days_before(date_from, window - 1),
+                DailyLog.date <= date_to
+            )
+            .order_by(DailyLog.date)
+        )).all()
 
-    if not summary:
-        raise HTTPException(status_code=400, detail="Not enough data")
+        columns = {
+            "work_hours": [row.work_hours for row in rows],
+            "study_hours": [row.study_hours for row in rows],
+            "sleep_hours": [row.sleep_hours for row in rows],
+            "mood_score": [row.mood_score for row in rows],
+            "goal_completed": [
+                None if row.goal_completed_percentage is None
+                else float(row.goal_completed_percentage)
+                for row in rows
+            ],
+        }
+
+        return {
+            "window": window,
+            "from": date_from,
+            "to": date_to,
+            "points": rolling_averages(
+                [row.date for row in rows], columns, date_from, date_to, window
+            ),
+        }
 
-    analytics = MonthlyAnalytics(
-        user_id=user_id,
-        month=month_key,
-        summary=summary
+    return await cached_json(
+        request, user_id, f"rolling:{window}:{date_from}:{date_to}", compute,
+        RollingAnalyticsResponse
     )
 
-    db.add(analytics)
-    db.commit()
 
-    return {
-        "month": month_key,
-        "summary": summary
-    }
+@router.get("/monthly/{month}", response_model=MonthAnalyticsResponse)
+async def get_month_analytics(
+    request: Request,
+    month: str = Path(pattern=MONTH_PATTERN),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Summary and per-metric stats of one month (YYYY-MM). Closed months are
+    served from their stored partials; others are computed from the logs.
+    """
+    async def compute():
+        stored = await db.scalar(select(MonthlyAnalytics).filter_by(
+            user_id=user_id, month=month
+        ))
+        closed = month < month_key(datetime.today())
+
+        if stored is not None and stored.partials and closed:
+            partials, summary = stored.partials, stored.summary
+        else:
+            partials = merge_partials(await _log_partials(db, user_id, *month_bounds(month)))
+            if partials is None:
+                raise HTTPException(status_code=404, detail="No logs for this month")
+
+            # Partials are only missing when the month's logs changed, so
+            # the stored summary is stale too
+            summary = summary_from_monthly_aggregate(
+                await get_monthly_aggregate(db, user_id, month)
+            )
+
+            # Closed months keep what was computed, so the next range or
+            # month request doesn't read their logs again
+            stmt = monthly_analytics_upsert(db.bind.dialect.name, [{
+                "user_id": user_id, "month": month, "summary": summary, "partials": partials,
+            }]) if closed else None
+            if stmt is not None:
+                await db.execute(stmt)
+                await db.commit()
+
+        return {
+            "month": month,
+            "days_logged": partials["log_count"],
+            "summary": summary,
+            "stats": stats_from_partials(partials),
+        }
+
+    return await cached_json(request, user_id, f"month:{month}", compute, MonthAnalyticsResponse)
+
+
+@router.get("/range", response_model=RangeAnalyticsResponse)
+async def get_range_analytics(
+    request: Request,
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Per-metric stats over [from, to], e.g. a quarter or a year. Whole
+    closed months are merged from stored partials; only the partial months
+    at the edges (and months without partials) are read from daily_logs.
+    """
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if date_to > MAX_RANGE_DATE:
+        raise HTTPException(
+            status_code=400, detail=f"'to' must not be after {MAX_RANGE_DATE}"
+        )
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {MAX_RANGE_DAYS} days"
+        )
+
+    async def compute():
+        current = month_key(datetime.today())
+        end = date_to + timedelta(days=1)
+
+        whole = [
+            month for month in month_keys(date_from, date_to)
+            if month < current
+            and month_bounds(month)[0] >= date_from
+            and month_bounds(month)[1] <= end
+        ]
+
+        stored = {}
+        if whole:
+            stored = dict((await db.execute(
+                select(MonthlyAnalytics.month, MonthlyAnalytics.partials).where(
+                    MonthlyAnalytics.user_id == user_id,
+                    MonthlyAnalytics.month.in_(whole),
+                    MonthlyAnalytics.partials.is_not(None)
+                )
+            )).all())
+
+        # Everything not covered by stored partials, as contiguous
+        # [start, end) spans so each needs one range scan
+        spans = []
+        for month in month_keys(date_from, date_to):
+            if month in stored:
+                continue
+            start, stop = month_bounds(month)
+            start, stop = max(start, date_from), min(stop, end)
+            if spans and spans[-1][1] == start:
+                spans[-1][1] = stop
+            else:
+                spans.append([start, stop])
+
+        parts = list(stored.values())
+        for start, stop in spans:
+            parts += await _log_partials(db, user_id, start, stop)
+
+        partials = merge_partials(parts)
+        if partials is None:
+            raise HTTPException(status_code=404, detail="No logs in this range")
+
+        return {
+            "from": date_from,
+            "to": date_to,
+            "days_logged": partials["log_count"],
+            "stats": stats_from_partials(partials),
+        }
+
+    return await cached_json(
+        request, user_id, f"range:{date_from}:{date_to}", compute, RangeAnalyticsResponse
+    )
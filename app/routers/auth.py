@@ -1,21 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Cookie,status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
 from hashlib import sha256
 from jose import jwt, JWTError
 
 from app.dependencies import get_current_user_id
-from app.models import User, RefreshToken
+from app.models import User
 from app.schemas import UserCreate, UserLogin
-from app.auth import hash_password, verify_password, create_access_token, create_refresh_token
+from app.auth import create_access_token, create_refresh_token
 from app.config import JWT_SECRET
 from app.db import get_db
+from app.hashing import password_hasher
+from app.refresh_tokens import refresh_tokens
+from app.token_cache import publish_token_invalidation
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already exists")
 
@@ -23,31 +29,28 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         email=user.email,
         name=user.name,
         role="user",
-        password_hash=hash_password(user.password)
+        password_hash=await password_hasher.hash(user.password),
+        created_at=datetime.now(timezone.utc).replace(tzinfo=None)
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return {"message": "User registered successfully"}
 
 @router.post("/login")
-def login(user: UserLogin, response: Response, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def login(user: UserLogin, response: Response, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email))
 
-    if not db_user or not verify_password(user.password, db_user.password_hash):
+    if not db_user or not await password_hasher.verify(user.password, db_user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token(db_user.id, db_user.role, db_user.token_version)
     refresh_token, token_hash, expires_at = create_refresh_token(db_user.id)
 
-    db.add(RefreshToken(
-        token_hash=token_hash,
-        user_id=db_user.id,
-        expires_at=expires_at
-    ))
-    db.commit()
+    await refresh_tokens.save(db, token_hash, db_user.id, expires_at)
+    await db.commit()
 
     response.set_cookie(
         key="refresh_token",
@@ -62,7 +65,7 @@ def login(user: UserLogin, response: Response, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh")
-def refresh(response: Response, refresh_token: str = Cookie(None), db: Session = Depends(get_db)):
+async def refresh(response: Response, refresh_token: str = Cookie(None), db: AsyncSession = Depends(get_db)):
     if not refresh_token:
         raise HTTPException(status_code=401, detail="Missing refresh token")
 
@@ -74,22 +77,13 @@ def refresh(response: Response, refresh_token: str = Cookie(None), db: Session =
 
     token_hash = sha256(refresh_token.encode()).hexdigest()
 
-    stored = db.query(RefreshToken).filter(
-        RefreshToken.token_hash == token_hash
-    ).first()
+    new_refresh, new_hash, expires_at = create_refresh_token(user_id)
 
-    if not stored:
+    # Consumes the old token and stores the new one atomically
+    if not await refresh_tokens.rotate(db, token_hash, new_hash, user_id, expires_at):
         raise HTTPException(status_code=401, detail="Token revoked")
 
-    db.delete(stored)
-
-    new_refresh, new_hash, expires_at = create_refresh_token(user_id)
-    db.add(RefreshToken(
-        token_hash=new_hash,
-        user_id=user_id,
-        expires_at=expires_at
-    ))
-    db.commit()
+    await db.commit()
 
     response.set_cookie(
         key="refresh_token",
@@ -100,18 +94,18 @@ def refresh(response: Response, refresh_token: str = Cookie(None), db: Session =
         path="/auth/refresh"
     )
 
-    user = db.query(User).get(user_id)
-    return {"access_token": create_access_token(user.id, user.role)}
+    user = await db.get(User, user_id)
+    return {"access_token": create_access_token(user.id, user.role, user.token_version)}
 
 
 @router.post("/logout")
-def logout(
+async def logout(
     response: Response,
     refresh_token: str = Cookie(None),
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = db.query(User).get(user_id)
+    user = await db.get(User, user_id)
     
     if user.token_version is None:
         user.token_version = 0
@@ -121,11 +115,12 @@ def logout(
 
     if refresh_token:
         token_hash = sha256(refresh_token.encode()).hexdigest()
-        db.query(RefreshToken).filter(
-            RefreshToken.token_hash == token_hash
-        ).delete()
+        await refresh_tokens.revoke(db, token_hash)
+
+    await db.commit()
 
-    db.commit()
+    # Drop the old version from every worker's token cache
+    await run_in_threadpool(publish_token_invalidation, user_id)
 
     # Clear refresh token cookie
     response.delete_cookie("refresh_token", path="/auth/refresh")
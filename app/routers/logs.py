@@ -1,45 +1,269 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
+import base64
+import binascii
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
 
 from app.models import DailyLog
-from app.schemas import DailyLogCreate
+from app.aggregates import UPSERT_DIALECTS, record_daily_log, record_daily_log_update
+from app.export import MEDIA_TYPES, export_daily_logs
+from app.ingest import FORMATS, detect_format, import_daily_logs
+from app.response_cache import bump_data_version
+from app.rollups import mark_rollup_dirty
+from app.schemas import (
+    DailyLogCreate,
+    DailyLogImportResult,
+    DailyLogPage,
+    DailyLogResponse,
+    DailyLogUpdate,
+)
 from app.dependencies import get_current_user_id
 from app.db import get_db
 
 router = APIRouter(prefix="/daily-logs", tags=["Daily Logs"])
 
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(day: date, log_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{day.isoformat()}|{log_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        day, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(day), int(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=DailyLogPage)
+async def list_daily_logs(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None,
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Daily logs in (date, id) order. Pages continue from `next_cursor`
+    with a keyset seek instead of OFFSET, so every page costs the same.
+    """
+    stmt = select(DailyLog).where(DailyLog.user_id == user_id)
+
+    if date_from is not None:
+        stmt = stmt.where(DailyLog.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(DailyLog.date <= date_to)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(DailyLog.date, DailyLog.id) > decode_cursor(cursor))
+
+    # One extra row tells whether another page exists
+    stmt = stmt.order_by(DailyLog.date, DailyLog.id).limit(limit + 1)
+    logs = (await db.scalars(stmt)).all()
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1].date, logs[-1].id)
+
+    return {"items": logs, "next_cursor": next_cursor}
+
 
 @router.post("/")
-def create_daily_log(
+async def create_daily_log(
     log: DailyLogCreate,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     today = datetime.today().date()
-    print(today)
-    exists = db.query(DailyLog).filter(
-        DailyLog.user_id == user_id,
-        DailyLog.date == today
-    ).first()
-    print(exists)
-    if exists:
+    values = log.model_dump()
+    row = {"user_id": user_id, "date": today, **values}
+
+    # One INSERT ... ON CONFLICT DO NOTHING RETURNING id: no separate
+    # existence check, and a double submit can't insert twice
+    insert_fn = UPSERT_DIALECTS.get(db.bind.dialect.name)
+    if insert_fn is not None:
+        log_id = await db.scalar(
+            insert_fn(DailyLog)
+            .values(row)
+            .on_conflict_do_nothing(index_elements=["user_id", "date"])
+            .returning(DailyLog.id)
+        )
+    else:
+        try:
+            log_id = await db.scalar(insert(DailyLog).values(row).returning(DailyLog.id))
+        except IntegrityError:
+            await db.rollback()
+            log_id = None
+
+    if log_id is None:
         raise HTTPException(
             status_code=400,
             detail="Daily log for today already exists"
         )
 
-    entry = DailyLog(
-        user_id=user_id,
-        date=today,
-        **log.model_dump()
-    )
+    await record_daily_log(db, user_id, today, values)
+    await db.commit()
 
-    db.add(entry)
-    db.commit()
-    db.refresh(entry)
+    await bump_data_version(user_id)
+    await mark_rollup_dirty([today])
 
     return {
         "message": "Daily log saved successfully",
-        "id": entry.id
-    }
\ No newline at end of file
+        "id": log_id
+    }
+
+
+# Dialects that can return the pre-update row from UPDATE ... FROM
+UPDATE_FROM_DIALECTS = {"postgresql"}
+
+LOG_COLUMNS = [
+    "work_hours",
+    "study_hours",
+    "sleep_hours",
+    "mood_score",
+    "goal_completed_percentage",
+    "notes",
+]
+
+
+async def update_daily_log(db, user_id: int, day: date, values: dict):
+    """
+    Updates the user's log for `day` in place and moves its contribution
+    to the monthly aggregate. Returns the updated row, or None if there is
+    no log for that day. Does not commit.
+    """
+    returned = [DailyLog.id, DailyLog.date, *[getattr(DailyLog, c) for c in LOG_COLUMNS]]
+    in_place = (DailyLog.user_id == user_id, DailyLog.date == day)
+
+    if db.bind.dialect.name in UPDATE_FROM_DIALECTS:
+        # The locked subquery hands back the values from before the UPDATE,
+        # so old and new come out of a single statement
+        old = (
+            select(DailyLog.id, *[getattr(DailyLog, c) for c in LOG_COLUMNS])
+            .where(*in_place)
+            .with_for_update()
+            .subquery("old")
+        )
+        row = (await db.execute(
+            update(DailyLog)
+            .where(DailyLog.id == old.c.id)
+            .values(values)
+            .returning(*returned, *[old.c[c].label(f"old_{c}") for c in LOG_COLUMNS])
+        )).first()
+        if row is None:
+            return None
+        old_values = {c: row._mapping[f"old_{c}"] for c in LOG_COLUMNS}
+    else:
+        previous = (await db.execute(
+            select(*[getattr(DailyLog, c) for c in LOG_COLUMNS])
+            .where(*in_place)
+            .with_for_update()
+        )).first()
+        if previous is None:
+            return None
+        old_values = dict(previous._mapping)
+        row = (await db.execute(
+            update(DailyLog).where(*in_place).values(values).returning(*returned)
+        )).first()
+
+    new_values = {c: row._mapping[c] for c in LOG_COLUMNS}
+    await record_daily_log_update(db, user_id, day, old_values, new_values)
+
+    return {column.key: row._mapping[column.key] for column in returned}
+
+
+async def _edit_daily_log(db, user_id: int, day: date, values: dict):
+    if not values:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+
+    entry = await update_daily_log(db, user_id, day, values)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Daily log not found")
+
+    await db.commit()
+    await bump_data_version(user_id)
+    await mark_rollup_dirty([day])
+
+    return entry
+
+
+@router.put("/{day}", response_model=DailyLogResponse)
+async def replace_daily_log(
+    day: date,
+    log: DailyLogCreate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Replaces every field of the log for `day` (YYYY-MM-DD).
+    """
+    return await _edit_daily_log(db, user_id, day, log.model_dump())
+
+
+@router.patch("/{day}", response_model=DailyLogResponse)
+async def patch_daily_log(
+    day: date,
+    log: DailyLogUpdate,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Updates only the fields sent for the log for `day` (YYYY-MM-DD).
+    """
+    return await _edit_daily_log(
+        db, user_id, day, log.model_dump(exclude_unset=True, exclude_none=True)
+    )
+
+
+@router.post("/import", response_model=DailyLogImportResult)
+async def import_logs(
+    request: Request,
+    format: str = Query(None, pattern="^(ndjson|csv)$"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import of dated daily logs, streamed as NDJSON or CSV (with a
+    header row). Dates that already have a log are counted as duplicates.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Send one of {', '.join(FORMATS)} or pass ?format=ndjson|csv"
+        )
+
+    result = await import_daily_logs(db, user_id, request.stream(), fmt)
+    return result.as_dict()
+
+
+@router.get("/export")
+async def export_logs(
+    format: str = Query("csv", pattern="^(ndjson|csv)$"),
+    date_from: date = Query(None, alias="from"),
+    date_to: date = Query(None, alias="to"),
+    gzip: bool = False,
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Streams the user's daily logs (optionally within [from, to]) as CSV or
+    NDJSON, gzip-encoded on request.
+    """
+    headers = {
+        "Content-Disposition": f'attachment; filename="daily-logs.{format}"'
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        export_daily_logs(user_id, format, date_from, date_to, gzip),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
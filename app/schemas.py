@@ -1,5 +1,6 @@
-from pydantic import BaseModel,Field
-from datetime import date
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date, datetime
+from typing import Literal
 
 
 class UserCreate(BaseModel):
@@ -22,6 +23,141 @@ class DailyLogCreate(BaseModel):
     )
     notes: str
 
+class DailyLogUpdate(BaseModel):
+    work_hours: float | None = None
+    study_hours: float | None = None
+    sleep_hours: float | None = None
+    mood_score: int | None = None
+    goal_completed_percentage: float | None = Field(
+        None, ge=0, le=100, description="Goal completion percentage (0-100)"
+    )
+    notes: str | None = None
+
+class DailyLogImport(DailyLogCreate):
+    date: date
+    notes: str = ""
+
+class DailyLogImportResult(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: int
+    errors: list[str]
+
+class DailyLogResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    date: date
+    work_hours: float
+    study_hours: float
+    sleep_hours: float
+    mood_score: int
+    goal_completed_percentage: float
+    notes: str | None = None
+
+class DailyLogPage(BaseModel):
+    items: list[DailyLogResponse]
+    next_cursor: str | None = None
+
+class MonthlySummary(BaseModel):
+    # Shape of analytics.generate_monthly_summary() and its aggregate and
+    # batch variants. Averages are None (NaN before) for a metric without
+    # values.
+    model_config = ConfigDict(strict=True)
+
+    avg_work_hours: float | None
+    avg_study_hours: float | None
+    avg_sleep_hours: float | None
+    goal_completion_rate: float | None
+    avg_mood: float | None
+    total_days_logged: int
+    work_trend: Literal["improving", "declining", "insufficient_data"]
+
 class MonthlyAnalyticsResponse(BaseModel):
+    model_config = ConfigDict(strict=True)
+
     month: str
-    summary: dict
+    summary: MonthlySummary
+
+class RollingAnalyticsPoint(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    date: date
+    days_logged: int
+    avg_work_hours: float | None = None
+    avg_study_hours: float | None = None
+    avg_sleep_hours: float | None = None
+    avg_mood: float | None = None
+    avg_goal_completed: float | None = None
+
+class RollingAnalyticsResponse(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    window: int
+    date_from: date = Field(alias="from")
+    date_to: date = Field(alias="to")
+    points: list[RollingAnalyticsPoint]
+
+class MetricStats(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    avg: float | None = None
+    std: float | None = None
+    min: float | None = None
+    max: float | None = None
+
+class AnalyticsStats(BaseModel):
+    # One entry per aggregates.METRICS key
+    model_config = ConfigDict(strict=True)
+
+    work_hours: MetricStats
+    study_hours: MetricStats
+    sleep_hours: MetricStats
+    mood_score: MetricStats
+    goal_completed: MetricStats
+
+class MonthAnalyticsResponse(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    month: str
+    days_logged: int
+    summary: MonthlySummary | None = None
+    stats: AnalyticsStats
+
+class RangeAnalyticsResponse(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    date_from: date = Field(alias="from")
+    date_to: date = Field(alias="to")
+    days_logged: int
+    stats: AnalyticsStats
+
+class JobRunResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    task_name: str
+    task_id: str
+    queue: str | None = None
+    worker: str | None = None
+    status: str
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_ms: float | None = None
+    rows_processed: int | None = None
+    failures: int
+    error: str | None = None
+
+class JobRunPage(BaseModel):
+    items: list[JobRunResponse]
+    next_before_id: int | None = None
+
+class JobRunTaskSummary(BaseModel):
+    task_name: str
+    runs: int
+    failed: int
+    running: int
+    avg_duration_ms: float | None = None
+    max_duration_ms: float | None = None
+    rows_processed: int
+    last_started_at: datetime
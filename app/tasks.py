@@ -1,96 +1,477 @@
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import distinct
+from sqlalchemy import Integer, case, cast, delete, extract, func, insert, select
 from app.celery_app import celery
+from app.config import (
+    NOTIFICATION_DRAIN_SECONDS,
+    NOTIFICATION_PURGE_BATCH_SIZE,
+    NOTIFICATION_RETENTION_DAYS,
+    NOTIFICATION_SEND_BATCH_SIZE,
+    REFRESH_TOKEN_PURGE_BATCH_SIZE,
+)
 from app.database import SessionLocal
-from app.models import DailyLog, MonthlyAnalytics
-from app.analytics import generate_monthly_summary
+from app.models import DailyLog, MonthlyAnalytics, RefreshToken
+from app.aggregates import (
+    month_bounds,
+    month_key,
+    month_key_expr,
+    monthly_analytics_upsert,
+    partials_from_row,
+    partials_query,
+    previous_month_key,
+)
+from app.batch_jobs import register_batch_job, start_batch_job
+from app.notifications import (
+    notification_sender,
+    purge_outbox_batch,
+    queue_missing_log_reminders,
+    send_outbox_batch,
+)
+from app.response_cache import bump_data_versions
+from app.rollups import refresh_daily_rollups, refresh_pending_rollups
+from app.analytics import (
+    HALF_MONTH_DAY,
+    generate_monthly_summary,
+    summary_from_aggregates,
+)
 
 
 # -------- DAILY JOB --------
 
-@celery.task(bind=True, autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 30})
-def daily_job(self):
+def schedule_today():
+    """
+    Today in the timezone beat schedules in, which is not necessarily the
+    server's: the midnight run must see the day that is just starting.
+    """
+    return datetime.now(ZoneInfo(celery.conf.timezone)).date()
+
+
+def reminder_day(day):
+    """
+    The day reminders of a daily_job run are about: the one that just
+    ended when the job runs at midnight.
+    """
+    return date.fromisoformat(day) - timedelta(days=1)
+
+
+def process_daily_shard(db, lo, hi, day):
+    return queue_missing_log_reminders(db, lo, hi, reminder_day(day))
+
+
+def finish_daily_job(run_id, progress, day):
+    print(
+        f"[DAILY JOB] {day}: queued {progress['processed']} reminders "
+        f"for {reminder_day(day)}"
+    )
+    send_notifications.delay()
+
+
+register_batch_job("daily", process_daily_shard, on_complete=finish_daily_job)
+
+
+@celery.task(
+    bind=True, ignore_result=True,
+    autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 30},
+)
+def daily_job(self, day=None, restart=False):
     """
     Runs every day at midnight.
-    Currently validates daily automation.
+    Queues a reminder for every user who didn't log the day that just
+    ended, then starts sending them (see app.notifications).
+    Fans out over user_id shards; see app.batch_jobs.
+    Refreshes the daily rollups of yesterday, today and any day whose logs
+    changed since the last run first.
+    """
+    day = day or schedule_today().isoformat()
+
+    db = SessionLocal()
+    try:
+        refreshed = refresh_pending_rollups(db, date.fromisoformat(day))
+    finally:
+        db.close()
+    print(f"[DAILY JOB] Refreshed rollups of {len(refreshed)} days")
+
+    start_batch_job("daily", day, restart=restart, day=day)
+
+
+# -------- MONTHLY JOB --------
+
+# Dialects the set-based summary query is known to run on, so every user's
+# summary is computed in one aggregation instead of one query per user
+SET_BASED_DIALECTS = {"postgresql", "sqlite"}
+
+MIN_DAYS_FOR_SUMMARY = 7
+
+
+def _user_range_filter(user_range):
+    if user_range is None:
+        return ()
+    lo, hi = user_range
+    return (DailyLog.user_id >= lo, DailyLog.user_id < hi)
+
+
+def aggregate_monthly_summaries(db, month, user_range=None):
+    """
+    Computes the summary of every user with enough logs in the month in a
+    single GROUP BY over that month's daily_logs. The work trend halves
+    are days 1-15 and the rest of the month (see analytics.work_trend).
+    user_range: optional [lo, hi) user_id bounds
+    """
+    start, end = month_bounds(month)
+
+    first_half = cast(extract("day", DailyLog.date), Integer) <= HALF_MONTH_DAY
+
+    stmt = (
+        select(
+            DailyLog.user_id,
+            func.count().label("total_days_logged"),
+            func.avg(DailyLog.work_hours).label("avg_work_hours"),
+            func.avg(DailyLog.study_hours).label("avg_study_hours"),
+            func.avg(DailyLog.sleep_hours).label("avg_sleep_hours"),
+            func.avg(DailyLog.goal_completed_percentage).label("avg_goal_completed"),
+            func.avg(DailyLog.mood_score).label("avg_mood"),
+            func.avg(case((first_half, DailyLog.work_hours))).label("first_half_work_hours"),
+            func.avg(case((~first_half, DailyLog.work_hours))).label("second_half_work_hours"),
+        )
+        .where(DailyLog.date >= start, DailyLog.date < end, *_user_range_filter(user_range))
+        .group_by(DailyLog.user_id)
+        .having(func.count() >= MIN_DAYS_FOR_SUMMARY)
+    )
+
+    return {
+        row.user_id: summary_from_aggregates(
+            row.total_days_logged,
+            row.avg_work_hours,
+            row.avg_study_hours,
+            row.avg_sleep_hours,
+            row.avg_goal_completed,
+            row.avg_mood,
+            row.first_half_work_hours,
+            row.second_half_work_hours,
+        )
+        for row in db.execute(stmt)
+    }
+
+
+def per_user_monthly_summaries(db, month, user_range=None):
+    """
+    Fallback for other dialects: one query per user.
+    """
+    start, end = month_bounds(month)
+    in_month = (DailyLog.date >= start, DailyLog.date < end, *_user_range_filter(user_range))
+
+    summaries = {}
+    users = db.query(DailyLog.user_id).filter(*in_month).distinct().all()
+
+    for user in users:
+        user_id = user[0]
+        logs = (
+            db.query(DailyLog)
+            .filter(DailyLog.user_id == user_id, *in_month)
+            .order_by(DailyLog.date, DailyLog.id)
+            .all()
+        )
+
+        # Minimum data requirement
+        if len(logs) < MIN_DAYS_FOR_SUMMARY:
+            continue
+
+        logs_data = [
+            {
+                "date": log.date,
+                "work_hours": log.work_hours,
+                "study_hours": log.study_hours,
+                "sleep_hours": log.sleep_hours,
+                "goal_completed": log.goal_completed_percentage,
+                "mood_score": log.mood_score,
+            }
+            for log in logs
+        ]
+
+        summary = generate_monthly_summary(logs_data)
+
+        if summary:
+            summaries[user_id] = summary
+
+    return summaries
+
+
+def save_monthly_summaries(db, month, summaries, partials=None):
+    """
+    Writes all summaries (and partials, when given) for the month with one
+    multi-row upsert on (user_id, month), replacing summaries cached while
+    the month was still in progress, and bumps the data version of those
+    users so their cached analytics responses are recomputed. Returns the
+    number of rows written.
+    """
+    if partials is None:
+        rows = [
+            {"user_id": user_id, "month": month, "summary": summary}
+            for user_id, summary in summaries.items()
+            if summary
+        ]
+    else:
+        # Users below MIN_DAYS_FOR_SUMMARY still get their partials stored
+        rows = [
+            {
+                "user_id": user_id,
+                "month": month,
+                "summary": summaries.get(user_id),
+                "partials": partials.get(user_id),
+            }
+            for user_id in sorted(set(partials) | {u for u, s in summaries.items() if s})
+        ]
+    if not rows:
+        return 0
+
+    stmt = monthly_analytics_upsert(db.get_bind().dialect.name, rows)
+    if stmt is not None:
+        db.execute(stmt)
+        db.commit()
+        bump_data_versions(row["user_id"] for row in rows)
+        return len(rows)
+
+    # No upsert: only insert the summaries that don't exist yet
+    existing = {
+        row[0]
+        for row in db.query(MonthlyAnalytics.user_id).filter(
+            MonthlyAnalytics.month == month
+        )
+    }
+
+    rows = [row for row in rows if row["user_id"] not in existing]
+
+    if rows:
+        db.execute(insert(MonthlyAnalytics), rows)
+        db.commit()
+        bump_data_versions(row["user_id"] for row in rows)
+
+    return len(rows)
+
+
+def monthly_partials(db, month, user_range=None):
+    """
+    user_id -> mergeable partials of the user's logs in the month.
+    """
+    start, end = month_bounds(month)
+    stmt = partials_query(
+        db.get_bind().dialect.name, start, end, *_user_range_filter(user_range)
+    )
+    return {row.user_id: partials_from_row(row) for row in db.execute(stmt)}
+
+
+def process_monthly_shard(db, lo, hi, month):
+    if db.get_bind().dialect.name in SET_BASED_DIALECTS:
+        summaries = aggregate_monthly_summaries(db, month, (lo, hi))
+    else:
+        summaries = per_user_monthly_summaries(db, month, (lo, hi))
+
+    # Partials only describe a finished month; the current one still changes
+    partials = None
+    if month < month_key(schedule_today()):
+        partials = monthly_partials(db, month, (lo, hi))
+
+    return save_monthly_summaries(db, month, summaries, partials)
+
+
+def finish_monthly_job(run_id, progress, month):
+    print(f"[MONTHLY JOB] Analytics for {month} generated for {progress['processed']} users")
+
+
+register_batch_job("monthly", process_monthly_shard, on_complete=finish_monthly_job)
+
+
+@celery.task(
+    bind=True, ignore_result=True,
+    autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def monthly_job(self, month=None, restart=False):
+    """
+    Runs on the 1st of every month.
+    Generates monthly analytics for the month that just ended
+    (or for month, as YYYY-MM).
+    Fans out over user_id shards; see app.batch_jobs.
+    """
+    month = month or previous_month_key(schedule_today())
+    start_batch_job("monthly", month, restart=restart, month=month)
+
+
+
+# -------- MONTHLY ANALYTICS BACKFILL --------
+
+def process_backfill_shard(db, lo, hi, before):
+    """
+    Summaries and partials of every month before `before` (YYYY-MM) in
+    which users of the shard have logs. Returns the user-months written.
+    """
+    month = month_key_expr(db.get_bind().dialect.name, DailyLog.date)
+    months = db.execute(
+        select(month)
+        .distinct()
+        .where(
+            DailyLog.user_id >= lo,
+            DailyLog.user_id < hi,
+            DailyLog.date < month_bounds(before)[0]
+        )
+        .order_by(month)
+    ).scalars().all()
+
+    return sum(process_monthly_shard(db, lo, hi, month) for month in months)
+
+
+def finish_backfill(run_id, progress, before):
+    print(f"[BACKFILL] Monthly analytics before {before}: {progress['processed']} user-months written")
+
+
+register_batch_job("monthly_backfill", process_backfill_shard, on_complete=finish_backfill)
+
+
+@celery.task(
+    bind=True, ignore_result=True,
+    autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def backfill_monthly_analytics(self, restart=False):
+    """
+    Run on demand.
+    Fills monthly_analytics summaries and partials for every closed month,
+    e.g. after deploying partials. restart=True recomputes shards that
+    already finished (after late edits to old months).
+    """
+    before = month_key(date.today())
+    start_batch_job("monthly_backfill", f"before-{before}", restart=restart, before=before)
+
+
+# Days refreshed per transaction by the rollup backfill
+ROLLUP_BACKFILL_DAYS = 31
+
+
+@celery.task(ignore_result=True)
+def backfill_daily_rollups(days=366):
+    """
+    Run on demand.
+    Fills daily_rollups for the last `days` days, e.g. after deploying
+    rollups; daily_job only refreshes recent and edited days.
+    """
+    today = date.today()
+    pending = [today - timedelta(days=offset) for offset in range(days)]
+
+    db = SessionLocal()
+    try:
+        for start in range(0, len(pending), ROLLUP_BACKFILL_DAYS):
+            refresh_daily_rollups(db, pending[start:start + ROLLUP_BACKFILL_DAYS])
+    finally:
+        db.close()
+
+    print(f"[ROLLUPS] Backfilled {days} days")
+    return days
+
+# -------- REFRESH TOKEN PURGE --------
+
+def purge_expired_refresh_tokens_batch(db, now, batch_size):
+    """
+    Deletes up to batch_size expired refresh tokens in one short
+    transaction. Returns the number of rows deleted.
+    """
+    expired = (
+        select(RefreshToken.id)
+        .where(RefreshToken.expires_at < now)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = db.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired)))
+    db.commit()
+    return result.rowcount
+
+
+@celery.task(
+    bind=True, ignore_result=True,
+    autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def purge_expired_refresh_tokens(self, batch_size=REFRESH_TOKEN_PURGE_BATCH_SIZE):
+    """
+    Runs every night.
+    Removes expired rows from refresh_tokens in batches, so no single
+    transaction holds locks on the whole table.
     """
     db = SessionLocal()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    purged = 0
 
     try:
-        users = db.query(distinct(DailyLog.user_id)).all()
+        while True:
+            deleted = purge_expired_refresh_tokens_batch(db, now, batch_size)
+            purged += deleted
+            if deleted < batch_size:
+                break
 
-        for user in users:
-            user_id = user[0]
-            # Future: daily motivation / reminders
-            print(f"[DAILY JOB] Processed user {user_id}")
+        print(f"[REFRESH TOKEN PURGE] Removed {purged} expired tokens")
 
     finally:
         db.close()
 
+    return purged
 
-# -------- MONTHLY JOB --------
 
-@celery.task(bind=True, autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 60})
-def monthly_job(self):
+# -------- NOTIFICATIONS --------
+
+@celery.task(ignore_result=True)
+def send_notifications(batch_size=NOTIFICATION_SEND_BATCH_SIZE):
     """
-    Runs on the 1st of every month.
-    Generates monthly analytics.
+    Runs every few minutes and after daily_job.
+    Drains due messages from notification_outbox in batches. Stops after
+    NOTIFICATION_DRAIN_SECONDS and queues a follow-up if messages remain,
+    so no run holds a worker for long.
     """
     db = SessionLocal()
-    current_month = datetime.today().strftime("%Y-%m")
+    started = time.monotonic()
+    sent = failed = 0
 
     try:
-        users = db.query(distinct(DailyLog.user_id)).all()
-
-        for user in users:
-            user_id = user[0]
-            logs = (
-                db.query(DailyLog)
-                .filter(DailyLog.user_id == user_id)
-                .all()
+        while True:
+            batch_sent, batch_failed, fetched = send_outbox_batch(
+                db, notification_sender, datetime.now(timezone.utc).replace(tzinfo=None), batch_size
             )
+            sent += batch_sent
+            failed += batch_failed
+            if fetched < batch_size:
+                break
+            if time.monotonic() - started > NOTIFICATION_DRAIN_SECONDS:
+                send_notifications.delay(batch_size)
+                break
 
-            # Minimum data requirement
-            if len(logs) < 7:
-                continue
-
-            logs_data = [
-                {
-                    "work_hours": log.work_hours,
-                    "study_hours": log.study_hours,
-                    "sleep_hours": log.sleep_hours,
-                    "goal_completed": log.goal_completed,
-                    "mood_score": log.mood_score,
-                }
-                for log in logs
-            ]
-
-            summary = generate_monthly_summary(logs_data)
-
-            if not summary:
-                continue
-
-            exists = (
-                db.query(MonthlyAnalytics)
-                .filter(
-                    MonthlyAnalytics.user_id == user_id,
-                    MonthlyAnalytics.month == current_month,
-                )
-                .first()
-            )
+    finally:
+        db.close()
 
-            if not exists:
-                db.add(
-                    MonthlyAnalytics(
-                        user_id=user_id,
-                        month=current_month,
-                        summary=summary,
-                    )
-                )
-                db.commit()
+    print(f"[NOTIFICATIONS] Sent {sent}, failed {failed}")
+    return sent
 
-                print(f"[MONTHLY JOB] Analytics generated for user {user.user_id}")
+
+@celery.task(
+    bind=True, ignore_result=True,
+    autoretry_for=(Exception,), retry_kwargs={"max_retries": 3, "countdown": 60},
+)
+def purge_notification_outbox(self, batch_size=NOTIFICATION_PURGE_BATCH_SIZE):
+    """
+    Runs every night.
+    Removes sent and dead messages older than NOTIFICATION_RETENTION_DAYS,
+    in batches.
+    """
+    db = SessionLocal()
+    before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+    purged = 0
+
+    try:
+        while True:
+            deleted = purge_outbox_batch(db, before, batch_size)
+            purged += deleted
+            if deleted < batch_size:
+                break
+
+        print(f"[NOTIFICATIONS] Purged {purged} old messages")
 
     finally:
         db.close()
+
+    return purged
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL_SECONDS
+from app.redis_client import get_redis
+
+INVALIDATION_CHANNEL = "token_version:invalidate"
+
+# Seconds to wait before re-subscribing after a lost Redis connection
+RECONNECT_DELAY = 1.0
+
+
+class TokenVersionCache:
+    """
+    In-process LRU/TTL cache of user_id -> token_version.
+
+    Entries are only served while the pub/sub listener is subscribed;
+    without it another worker's logout could go unnoticed, so every
+    lookup falls through to the database instead.
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.subscribed = False
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a DB read that raced with a
+        # logout can't put the old version back into the cache
+        self._generation = 0
+        self._listener = None
+
+    def get(self, user_id):
+        """
+        Returns (token_version, generation). token_version is None on a miss;
+        pass the generation back to set() after reading the database.
+        """
+        self.ensure_listener()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id) if self.subscribed else None
+
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0], self._generation
+
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None, self._generation
+
+    def set(self, user_id, token_version, generation):
+        with self._lock:
+            if not self.subscribed or generation != self._generation:
+                return
+
+            self._entries[user_id] = (token_version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "subscribed": self.subscribed,
+            }
+
+    # -------- cross-worker invalidation --------
+
+    def ensure_listener(self):
+        if self._listener is not None:
+            return
+
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name="token-cache-listener", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+
+                # Anything cached before the subscription may have missed
+                # an invalidation, so start from empty
+                self.clear()
+                self.subscribed = True
+
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate(int(message["data"]))
+
+            except Exception as exc:
+                print(f"[TOKEN CACHE] Invalidation listener disconnected: {exc}")
+
+            finally:
+                self.subscribed = False
+                self.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            time.sleep(RECONNECT_DELAY)
+
+
+token_versions = TokenVersionCache()
+
+
+def publish_token_invalidation(user_id: int):
+    """
+    Drops user_id from this worker's cache and tells every other worker
+    to do the same. Call after the token_version change is committed.
+    """
+    token_versions.invalidate(user_id)
+
+    try:
+        get_redis().publish(INVALIDATION_CHANNEL, str(user_id))
+    except Exception as exc:
+        # Workers that can't reach Redis aren't subscribed either, and
+        # unsubscribed workers never serve from their cache
+        print(f"[TOKEN CACHE] Failed to publish invalidation for user {user_id}: {exc}")
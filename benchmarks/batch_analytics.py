@@ -0,0 +1,109 @@
+"""
+Per-user cost of the batch analytics kernel vs. the single-user summaries.
+
+    python -m benchmarks.batch_analytics
+    python -m benchmarks.batch_analytics --users 10000 100000 --days 30
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.analytics import (
+    generate_monthly_summaries,
+    generate_monthly_summary,
+    generate_monthly_summary_pandas,
+)
+
+PER_USER_SAMPLE = 1000
+
+
+def make_logs(users, days, seed=0):
+    rng = np.random.default_rng(seed)
+
+    # Between 1 and `days` logs per user, so several count buckets exist
+    counts = rng.integers(1, days + 1, size=users)
+    total = int(counts.sum())
+
+    user_ids = np.repeat(np.arange(1, users + 1), counts)
+    offsets = np.concatenate([rng.permutation(days)[:c] for c in counts])
+    dates = np.datetime64("2025-01-01") + offsets.astype("timedelta64[D]")
+
+    return {
+        "user_ids": user_ids,
+        "dates": dates,
+        "work_hours": np.round(rng.uniform(0, 12, total), 1),
+        "study_hours": np.round(rng.uniform(0, 6, total), 1),
+        "sleep_hours": np.round(rng.uniform(3, 10, total), 1),
+        "goal_completed": np.round(rng.uniform(0, 100, total), 2),
+        "mood_score": rng.integers(1, 11, total),
+    }
+
+
+def per_user_inputs(logs, sample):
+    """
+    Each sampled user's logs as the list of dicts the per-user path takes,
+    in date order.
+    """
+    order = np.lexsort((logs["dates"], logs["user_ids"]))
+    sorted_ids = logs["user_ids"][order]
+    metrics = ("work_hours", "study_hours", "sleep_hours", "goal_completed", "mood_score")
+    dates = logs["dates"].astype(object)  # datetime.date, like rows from the DB
+
+    inputs = []
+    for user_id in sample:
+        lo, hi = np.searchsorted(sorted_ids, [user_id, user_id + 1])
+        rows = order[lo:hi]
+        inputs.append((
+            int(user_id),
+            [{"date": dates[i], **{name: logs[name][i] for name in metrics}} for i in rows],
+        ))
+    return inputs
+
+
+def run(users, days):
+    logs = make_logs(users, days)
+
+    start = time.perf_counter()
+    batch = generate_monthly_summaries(**logs)
+    batch_seconds = time.perf_counter() - start
+
+    sample = np.random.default_rng(1).choice(
+        np.arange(1, users + 1), size=min(PER_USER_SAMPLE, users), replace=False
+    )
+    inputs = per_user_inputs(logs, sample)
+
+    start = time.perf_counter()
+    reference = [(user_id, generate_monthly_summary_pandas(rows)) for user_id, rows in inputs]
+    pandas_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pure = [(user_id, generate_monthly_summary(rows)) for user_id, rows in inputs]
+    pure_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for user_id, summary in reference if batch[user_id] != summary)
+    pure_mismatches = sum(1 for user_id, summary in pure if batch[user_id] != summary)
+
+    print(
+        f"users={users:>7} rows={len(logs['user_ids']):>8} "
+        f"batch={batch_seconds:8.3f}s "
+        f"batch/user={batch_seconds / users * 1e6:8.2f}us "
+        f"pandas/user={pandas_seconds / len(sample) * 1e6:8.2f}us "
+        f"pure/user={pure_seconds / len(sample) * 1e6:8.2f}us "
+        f"mismatches={mismatches}/{len(sample)} "
+        f"pure_mismatches={pure_mismatches}/{len(sample)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--days", type=int, default=31)
+    args = parser.parse_args()
+
+    for users in args.users:
+        run(users, args.days)
+
+
+if __name__ == "__main__":
+    main()
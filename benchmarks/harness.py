@@ -0,0 +1,157 @@
+"""
+Shared pieces of the micro-benchmarks and the load harness: scratch
+environment, latency statistics, JSON results and the regression gate.
+
+Import this before any app module: it points DATABASE_URL at a scratch
+SQLite database unless one is set.
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/benchmarks.db")
+os.environ.setdefault("JWT_SECRET", "benchmarks")
+
+PERCENTILES = (50, 95, 99)
+
+# Default allowed slowdown before --baseline fails the run
+DEFAULT_MAX_REGRESSION = 0.25
+
+
+def use_fake_redis():
+    # Without a REDIS_URL the token cache, response cache and batch-job
+    # checkpoints run against fakeredis so the suite runs standalone
+    if os.environ.get("REDIS_URL"):
+        return
+    try:
+        import fakeredis
+    except ImportError:
+        return
+    from app.redis_client import set_redis
+
+    set_redis(fakeredis.FakeRedis())
+
+
+def percentile(ordered, p):
+    # Nearest rank on an already sorted list
+    if not ordered:
+        return None
+    rank = max(int(round(p / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples, wall_seconds, errors=0):
+    """
+    Latency percentiles (ms) and throughput (ops/s) of one benchmark.
+    samples are per-operation durations in seconds.
+    """
+    ordered = sorted(samples)
+    result = {
+        "count": len(ordered),
+        "errors": errors,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+    }
+    for p in PERCENTILES:
+        value = percentile(ordered, p)
+        result[f"p{p}_ms"] = round(value * 1000, 3) if value is not None else None
+    result["throughput_per_s"] = round(len(ordered) / wall_seconds, 2) if wall_seconds else None
+    return result
+
+
+def measure(fn, iterations, warmup=1):
+    """
+    Calls fn() `iterations` times after `warmup` untimed calls and
+    summarizes the per-call durations.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - call_started)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def add_arguments(parser):
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        help="results JSON of a previous run; fail if any benchmark regressed",
+    )
+    parser.add_argument(
+        "--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+        help="allowed relative slowdown of p95 and throughput (default 0.25)",
+    )
+
+
+def regressions(results, baseline, max_regression):
+    """
+    Benchmarks whose p95 grew, or whose throughput shrank, by more than
+    max_regression relative to the baseline. Benchmarks missing from
+    either side are skipped, as are runs with more errors than before.
+    """
+    found = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        if current["errors"] > previous.get("errors", 0):
+            found.append(f"{name}: {current['errors']} errors (baseline {previous.get('errors', 0)})")
+
+        p95, base_p95 = current["p95_ms"], previous.get("p95_ms")
+        if p95 is not None and base_p95 and p95 > base_p95 * (1 + max_regression):
+            found.append(f"{name}: p95 {p95}ms vs {base_p95}ms")
+
+        rate, base_rate = current["throughput_per_s"], previous.get("throughput_per_s")
+        if rate is not None and base_rate and rate < base_rate * (1 - max_regression):
+            found.append(f"{name}: throughput {rate}/s vs {base_rate}/s")
+    return found
+
+
+def report(suite, results, args, params):
+    """
+    Prints the results, writes them to --out and exits non-zero if they
+    regressed against --baseline.
+    """
+    for name, result in results.items():
+        print(
+            f"{name:<34} n={result['count']:>6} "
+            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+            f"{result['throughput_per_s']}/s"
+            f"{'  errors=' + str(result['errors']) if result['errors'] else ''}"
+        )
+
+    if args.out:
+        document = {
+            "suite": suite,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": os.environ["DATABASE_URL"].split("://", 1)[0],
+            "params": params,
+            "results": results,
+        }
+        with open(args.out, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("params") != params:
+            print(f"Warning: baseline params {baseline.get('params')} differ from {params}")
+
+        found = regressions(results, baseline["results"], args.max_regression)
+        for line in found:
+            print("REGRESSION " + line)
+        if found:
+            sys.exit(1)
+        print(f"No regressions over {args.max_regression:.0%} against {args.baseline}")
@@ -0,0 +1,81 @@
+"""
+Import-time budget for API and Celery worker startup.
+
+Imports each entry module in a fresh interpreter, fails if it takes longer
+than the budget or pulls in a module that must stay lazy (pandas, numpy).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1500 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ENTRY_MODULES = ["app.main", "app.tasks"]
+
+# Only batch analytics may import these, and only when called
+LAZY_MODULES = ["pandas", "numpy"]
+
+DEFAULT_BUDGET_MS = 1500
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module, runs):
+    env = {
+        # Module import must not need a real database/secret
+        "DATABASE_URL": "sqlite://",
+        "JWT_SECRET": "import-time",
+        "REDIS_URL": "redis://localhost:6379/0",
+        **os.environ,
+    }
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded = result["loaded"]
+    # Best of N: the least noisy estimate of the real import cost
+    return min(samples), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    for module in ENTRY_MODULES:
+        ms, loaded = measure(module, args.runs)
+        over = ms > args.budget_ms
+        failed = failed or over or bool(loaded)
+        print(
+            f"{module:<12} {ms:8.1f}ms (budget {args.budget_ms:.0f}ms)"
+            f"{'  OVER BUDGET' if over else ''}"
+            f"{'  eager imports: ' + ', '.join(loaded) if loaded else ''}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
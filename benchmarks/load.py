@@ -0,0 +1,123 @@
+"""
+In-process HTTP load harness for app.main:app.
+
+Seeds a scratch database (SQLite unless DATABASE_URL is set), runs the
+app with its lifespan behind httpx's ASGI transport and keeps
+--concurrency requests in flight per scenario. Latency covers the whole
+ASGI round trip, without sockets.
+
+    python -m benchmarks.load
+    python -m benchmarks.load --requests 2000 --concurrency 32 --out load.json
+    python -m benchmarks.load --baseline load.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from benchmarks import harness
+from benchmarks.seed import SEED_PASSWORD, seed, seed_email
+
+
+def scenarios(user_ids, args):
+    """
+    Scenario name -> function(client, index) sending one request.
+    """
+    from app.auth import create_access_token
+
+    # Tokens are minted directly: only the login scenario should pay bcrypt
+    headers = [
+        {"Authorization": f"Bearer {create_access_token(user_id, 'user', 1)}"}
+        for user_id in user_ids
+    ]
+
+    def login(client, index):
+        return client.post("/auth/login", json={
+            "email": seed_email(index % len(user_ids)),
+            "password": SEED_PASSWORD,
+        })
+
+    def list_logs(client, index):
+        return client.get("/daily-logs/?limit=31", headers=headers[index % len(headers)])
+
+    def monthly(client, index):
+        return client.get("/analytics/monthly", headers=headers[index % len(headers)])
+
+    return {
+        "POST /auth/login": (login, args.login_requests),
+        "GET /daily-logs/": (list_logs, args.requests),
+        "GET /analytics/monthly": (monthly, args.requests),
+    }
+
+
+async def run_scenario(client, send, requests, concurrency):
+    samples = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (index := next(counter)) < requests:
+            started = time.perf_counter()
+            response = await send(client, index)
+            samples.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return harness.summarize(samples, time.perf_counter() - started, errors)
+
+
+async def run(args):
+    import httpx
+
+    from app.main import app
+    from app.token_cache import token_versions
+
+    user_ids, _ = seed(args.users, args.days, args.seed)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # The token-version cache only caches once its listener runs
+            token_versions.ensure_listener()
+            deadline = time.monotonic() + 5
+            while not token_versions.subscribed and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+
+            for name, (send, requests) in scenarios(user_ids, args).items():
+                # Warm-up: pools, caches and the first-call import costs
+                await run_scenario(client, send, min(args.concurrency, requests), args.concurrency)
+                results[name] = await run_scenario(client, send, requests, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=62)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--login-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    harness.use_fake_redis()
+    results = asyncio.run(run(args))
+
+    params = {
+        "users": args.users,
+        "days": args.days,
+        "seed": args.seed,
+        "requests": args.requests,
+        "login_requests": args.login_requests,
+        "concurrency": args.concurrency,
+    }
+    harness.report("load", results, args, params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmarks of the summary kernel, the monthly job and the auth
+primitives.
+
+monthly_job runs in Celery eager mode against a freshly seeded scratch
+database (SQLite unless DATABASE_URL is set), so its numbers include the
+SQL work of every shard.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --users 2000 --out micro.json
+    python -m benchmarks.micro --baseline micro.json --max-regression 0.2
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from benchmarks import harness
+from benchmarks.seed import SEED_PASSWORD, seed
+
+
+def summary_inputs(days, rng):
+    return [
+        {
+            "date": date(2025, 1, 1) + timedelta(days=i),
+            "work_hours": round(rng.uniform(0, 12), 1),
+            "study_hours": round(rng.uniform(0, 6), 1),
+            "sleep_hours": round(rng.uniform(3, 10), 1),
+            "goal_completed": round(rng.uniform(0, 1), 4),
+            "mood_score": rng.randint(1, 10),
+        }
+        for i in range(days)
+    ]
+
+
+def bench_summary(args):
+    from app.analytics import generate_monthly_summary
+
+    logs = summary_inputs(31, random.Random(args.seed))
+    return harness.measure(lambda: generate_monthly_summary(logs), args.iterations)
+
+
+def bench_monthly_job(args):
+    from app.aggregates import month_key
+    from app.celery_app import celery
+    from app.tasks import monthly_job
+
+    celery.conf.task_always_eager = True
+
+    # Seeded days end yesterday; the last complete month is fully covered
+    # once --days is 62 or more
+    month = month_key(date.today().replace(day=1) - timedelta(days=1))
+    seed(args.users, args.days, args.seed)
+
+    # restart: every run recomputes all shards instead of resuming
+    return harness.measure(
+        lambda: monthly_job.apply(kwargs={"month": month, "restart": True}).get(),
+        args.job_runs,
+    )
+
+
+def bench_auth(args):
+    from jose import jwt
+
+    from app.auth import (
+        ALGORITHM,
+        create_access_token,
+        create_refresh_token,
+        hash_password,
+        verify_password,
+    )
+    from app.config import JWT_SECRET
+
+    hashed = hash_password(SEED_PASSWORD)
+    token = create_access_token(1, "user", 1)
+
+    return {
+        # bcrypt is deliberately slow; a handful of rounds is enough
+        "auth.hash_password": harness.measure(
+            lambda: hash_password(SEED_PASSWORD), args.bcrypt_iterations
+        ),
+        "auth.verify_password": harness.measure(
+            lambda: verify_password(SEED_PASSWORD, hashed), args.bcrypt_iterations
+        ),
+        "auth.create_access_token": harness.measure(
+            lambda: create_access_token(1, "user", 1), args.iterations
+        ),
+        "auth.decode_access_token": harness.measure(
+            lambda: jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM]), args.iterations
+        ),
+        "auth.create_refresh_token": harness.measure(
+            lambda: create_refresh_token(1), args.iterations
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=62)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--bcrypt-iterations", type=int, default=10)
+    parser.add_argument("--job-runs", type=int, default=5)
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    harness.use_fake_redis()
+
+    results = {
+        "analytics.generate_monthly_summary": bench_summary(args),
+        "tasks.monthly_job": bench_monthly_job(args),
+        **bench_auth(args),
+    }
+
+    params = {
+        "users": args.users,
+        "days": args.days,
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "bcrypt_iterations": args.bcrypt_iterations,
+        "job_runs": args.job_runs,
+    }
+    harness.report("micro", results, args, params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-request SQL statement budgets for the daily-log write endpoints.
+
+Runs each request against a scratch database (SQLite unless DATABASE_URL
+is set) with a warm token-version cache, counts the statements the API
+engine executes and fails if any request goes over its budget.
+
+    python -m benchmarks.query_counts
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.query_counts
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/query_counts.db")
+os.environ.setdefault("JWT_SECRET", "query-counts")
+
+LOG = {
+    "work_hours": 6,
+    "study_hours": 2,
+    "sleep_hours": 7,
+    "mood_score": 7,
+    "goal_completed_percentage": 80,
+    "notes": "",
+}
+
+# Statements per request; dialects without UPDATE ... FROM ... RETURNING
+# need one extra SELECT for the edit endpoints
+BUDGETS = {
+    "create": 2,        # INSERT ... ON CONFLICT RETURNING, aggregate upsert
+    "duplicate": 1,     # INSERT ... ON CONFLICT RETURNING (no row)
+    "put": 2,           # UPDATE ... FROM ... RETURNING, aggregate upsert
+    "patch": 2,
+    "patch_missing": 1,
+}
+FALLBACK_EXTRA = {"put": 1, "patch": 1, "patch_missing": 0}
+
+
+def use_fake_redis():
+    # The token-version cache and data-version counter need Redis; use
+    # fakeredis when it is installed so the script runs standalone
+    try:
+        import fakeredis
+    except ImportError:
+        return
+    from app.redis_client import set_redis
+
+    set_redis(fakeredis.FakeRedis())
+
+
+def main():
+    use_fake_redis()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.database import Base, async_engine, engine
+    from app.main import app
+    from app.routers.logs import UPDATE_FROM_DIALECTS
+    from app.token_cache import token_versions
+
+    Base.metadata.create_all(engine)
+
+    statements = []
+    event.listen(
+        async_engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    budgets = dict(BUDGETS)
+    if async_engine.dialect.name not in UPDATE_FROM_DIALECTS:
+        for name, extra in FALLBACK_EXTRA.items():
+            budgets[name] += extra
+
+    with TestClient(app) as client:
+        credentials = {"email": "query-counts@example.com", "password": "query-counts"}
+        client.post("/auth/register", json={**credentials, "name": "query counts"})
+        token = client.post("/auth/login", json=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        # Warm the token-version cache so auth costs no query; it only
+        # caches once its invalidation listener has subscribed
+        token_versions.ensure_listener()
+        deadline = time.monotonic() + 5
+        while not token_versions.subscribed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client.get("/daily-logs/", headers=headers)
+
+        today = date.today().isoformat()
+        requests = [
+            ("create", lambda: client.post("/daily-logs/", json=LOG, headers=headers)),
+            ("duplicate", lambda: client.post("/daily-logs/", json=LOG, headers=headers)),
+            ("put", lambda: client.put(
+                f"/daily-logs/{today}", json={**LOG, "work_hours": 8}, headers=headers
+            )),
+            ("patch", lambda: client.patch(
+                f"/daily-logs/{today}", json={"mood_score": 9}, headers=headers
+            )),
+            ("patch_missing", lambda: client.patch(
+                "/daily-logs/1999-01-01", json={"mood_score": 9}, headers=headers
+            )),
+        ]
+
+        failed = False
+        for name, send in requests:
+            statements.clear()
+            response = send()
+            count = len(statements)
+            over = count > budgets[name]
+            failed = failed or over
+            print(
+                f"{name:<14} {response.status_code}  {count} statements "
+                f"(budget {budgets[name]}){'  OVER BUDGET' if over else ''}"
+            )
+            if over:
+                for statement in statements:
+                    print("    " + " ".join(statement.split())[:160])
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Seeded data generator: N users x M days of daily logs.
+
+Writes to DATABASE_URL (SQLite or a local Postgres) and creates missing
+tables first. The same --seed always produces the same rows. Monthly
+aggregates and daily rollups are rebuilt afterwards, as the API expects.
+Every seeded user logs in with SEED_PASSWORD.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --users 1000 --days 90
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.seed --users 10000
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+SEED_PASSWORD = "benchmark-password"
+EMAIL = "bench-{index}@example.com"
+
+# Rows per INSERT batch
+BATCH_SIZE = 5000
+
+
+def seed_email(index):
+    return EMAIL.format(index=index)
+
+
+def generate_logs(user_ids, days, start, rng, density):
+    """
+    Daily log rows; each user logs on roughly `density` of the days.
+    """
+    for user_id in user_ids:
+        # Per-user habits, so users differ from each other
+        sleep = rng.uniform(5.5, 8.5)
+        mood = rng.uniform(4, 8)
+        for offset in range(days):
+            if rng.random() >= density:
+                continue
+            yield {
+                "user_id": user_id,
+                "date": start + timedelta(days=offset),
+                "work_hours": round(rng.uniform(0, 12), 1),
+                "study_hours": round(rng.uniform(0, 6), 1),
+                "sleep_hours": round(min(max(rng.gauss(sleep, 1), 0), 14), 1),
+                "mood_score": min(max(round(rng.gauss(mood, 1.5)), 1), 10),
+                "goal_completed_percentage": round(rng.uniform(0, 100), 2),
+                "notes": "",
+            }
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(users, days, seed=0, density=0.8, end=None):
+    """
+    Inserts `users` users and their logs for the `days` days up to `end`
+    (default yesterday). Returns (user ids, number of logs).
+    """
+    from sqlalchemy import insert, select
+
+    from app.aggregates import rebuild_monthly_aggregates
+    from app.auth import hash_password
+    from app.database import Base, SessionLocal, engine
+    from app.models import DailyLog, User
+    from app.rollups import refresh_daily_rollups
+
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    end = end or date.today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+
+    db = SessionLocal()
+    try:
+        if db.scalar(select(User.id).where(User.email == seed_email(0))) is not None:
+            raise SystemExit("Database already seeded; use a fresh one")
+
+        # bcrypt is slow on purpose: hash the shared password once
+        password_hash = hash_password(SEED_PASSWORD)
+        for batch in _batches(range(users), BATCH_SIZE):
+            db.execute(insert(User), [
+                {
+                    "email": seed_email(index),
+                    "name": f"Bench {index}",
+                    "password_hash": password_hash,
+                    "role": "user",
+                    "token_version": 1,
+                }
+                for index in batch
+            ])
+        db.commit()
+
+        user_ids = db.scalars(
+            select(User.id).where(User.email.like(EMAIL.format(index="%"))).order_by(User.id)
+        ).all()
+
+        logs = 0
+        for batch in _batches(generate_logs(user_ids, days, start, rng, density), BATCH_SIZE):
+            db.execute(insert(DailyLog), batch)
+            logs += len(batch)
+        db.commit()
+
+        rebuild_monthly_aggregates(db)
+        refresh_daily_rollups(db, [start + timedelta(days=offset) for offset in range(days)])
+    finally:
+        db.close()
+
+    return user_ids, logs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.8, help="share of days with a log")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_ids, logs = seed(args.users, args.days, args.seed, args.density)
+    print(
+        f"Seeded {len(user_ids)} users and {logs} daily logs "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
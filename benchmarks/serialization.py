@@ -0,0 +1,140 @@
+"""
+JSON serialization cost of large analytics and history payloads, before
+(FastAPI's generic jsonable_encoder + json.dumps) and after (typed models
+serialized by pydantic-core, orjson for untyped bodies and NDJSON export).
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 10000 --out serialization.json
+    python -m benchmarks.serialization --baseline serialization.json
+
+The daily_logs_page lines compare the generic path, FastAPI's
+response_model path (JSON straight from the model, what GET /daily-logs/
+uses) and what an app-wide orjson response class would turn that route
+into: a dump to Python objects first, then orjson.
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+from benchmarks import harness
+
+
+def daily_log_rows(count, rng):
+    start = date(2020, 1, 1)
+    return [
+        {
+            "id": index + 1,
+            "date": start + timedelta(days=index),
+            "work_hours": round(rng.uniform(0, 12), 1),
+            "study_hours": round(rng.uniform(0, 6), 1),
+            "sleep_hours": round(rng.uniform(3, 10), 1),
+            "mood_score": rng.randint(1, 10),
+            "goal_completed_percentage": round(rng.uniform(0, 100), 2),
+            "notes": "felt productive today",
+        }
+        for index in range(count)
+    ]
+
+
+def rolling_payload(points, rng):
+    start = date(2024, 1, 1)
+    return {
+        "window": 7,
+        "from": start,
+        "to": start + timedelta(days=points - 1),
+        "points": [
+            {
+                "date": start + timedelta(days=index),
+                "days_logged": rng.randint(0, 7),
+                "avg_work_hours": round(rng.uniform(0, 12), 2),
+                "avg_study_hours": round(rng.uniform(0, 6), 2),
+                "avg_sleep_hours": round(rng.uniform(3, 10), 2),
+                "avg_mood": round(rng.uniform(1, 10), 2),
+                "avg_goal_completed": round(rng.uniform(0, 100), 2),
+            }
+            for index in range(points)
+        ],
+    }
+
+
+def monthly_payload():
+    return {
+        "month": "2024-05",
+        "summary": {
+            "avg_work_hours": 6.42,
+            "avg_study_hours": 2.1,
+            "avg_sleep_hours": 7.05,
+            "goal_completion_rate": 6120.5,
+            "avg_mood": 6.3,
+            "total_days_logged": 28,
+            "work_trend": "improving",
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000, help="daily logs in history/export payloads")
+    parser.add_argument("--points", type=int, default=732, help="points of the rolling payload")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from app.export import _record
+    from app.response_cache import render_json
+    from app.schemas import DailyLogPage, MonthlyAnalyticsResponse, RollingAnalyticsResponse
+
+    def before(content):
+        # cached_json and JSONResponse before typed models
+        return json.dumps(jsonable_encoder(content)).encode()
+
+    rng = random.Random(args.seed)
+    rows = daily_log_rows(args.rows, rng)
+    page = {"items": rows, "next_cursor": None}
+    rolling = rolling_payload(args.points, rng)
+    monthly = monthly_payload()
+
+    page_adapter = TypeAdapter(DailyLogPage)
+    export_rows = [tuple(row[column] for column in (
+        "date", "work_hours", "study_hours", "sleep_hours", "mood_score",
+        "goal_completed_percentage", "notes",
+    )) for row in rows]
+
+    n = args.iterations
+    results = {
+        "monthly.before": harness.measure(lambda: before(monthly), n * 20),
+        "monthly.after": harness.measure(
+            lambda: render_json(monthly, MonthlyAnalyticsResponse), n * 20
+        ),
+        "rolling.before": harness.measure(lambda: before(rolling), n),
+        "rolling.after": harness.measure(lambda: render_json(rolling, RollingAnalyticsResponse), n),
+        "daily_logs_page.generic": harness.measure(lambda: before(page), n),
+        "daily_logs_page.response_model": harness.measure(
+            lambda: page_adapter.dump_json(page_adapter.validate_python(page)), n
+        ),
+        "daily_logs_page.orjson_class": harness.measure(
+            lambda: orjson.dumps(
+                page_adapter.dump_python(page_adapter.validate_python(page), mode="json")
+            ),
+            n,
+        ),
+        "export_ndjson.before": harness.measure(
+            lambda: b"".join((json.dumps(_record(row)) + "\n").encode() for row in export_rows), n
+        ),
+        "export_ndjson.after": harness.measure(
+            lambda: b"".join(orjson.dumps(_record(row)) + b"\n" for row in export_rows), n
+        ),
+    }
+
+    params = {"rows": args.rows, "points": args.points, "iterations": args.iterations, "seed": args.seed}
+    harness.report("serialization", results, args, params)
+
+
+if __name__ == "__main__":
+    main()
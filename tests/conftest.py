@@ -0,0 +1,150 @@
+"""
+Shared fixtures. The app runs against a scratch SQLite database (or
+TEST_DATABASE_URL) and fakeredis; nothing needs a running Postgres, Redis
+or Celery worker.
+"""
+import json
+import os
+import tempfile
+
+# Before any app module reads the configuration
+os.environ["DATABASE_URL"] = (
+    os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/test.db"
+)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.redis_client import set_redis
+
+# One client for the whole session: the token cache's pub/sub listener
+# subscribes once and keeps using it
+fake_redis = fakeredis.FakeRedis()
+set_redis(fake_redis)
+
+from app.celery_app import celery
+from app.database import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import User
+from app.token_cache import token_versions
+from tests.helpers import PASSWORD
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    fake_redis.flushall()
+    token_versions.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    # https so the Secure refresh-token cookie is sent back
+    with TestClient(app, base_url="https://testserver") as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client):
+    app_client.cookies.clear()
+    return app_client
+
+
+def _register(client, email, role=None):
+    client.post("/auth/register", json={"email": email, "name": email, "password": PASSWORD})
+    if role is not None:
+        session = SessionLocal()
+        session.query(User).filter(User.email == email).update({"role": role})
+        session.commit()
+        session.close()
+    response = client.post("/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+
+    session = SessionLocal()
+    user_id = session.query(User.id).filter(User.email == email).scalar()
+    session.close()
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def register():
+    """
+    register(client, email, role=None) signs a user up and logs them in;
+    returns (user_id, auth headers).
+    """
+    return _register
+
+
+@pytest.fixture
+def user(client):
+    return _register(client, "user@example.com")
+
+
+def _import_logs(client, headers, entries):
+    body = "".join(json.dumps(entry) + "\n" for entry in entries)
+    response = client.post(
+        "/daily-logs/import",
+        content=body.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def import_logs():
+    """
+    import_logs(client, headers, entries) posts entries (see log_entry)
+    to /daily-logs/import; returns the import result.
+    """
+    return _import_logs
+
+
+@pytest.fixture
+def redis():
+    return fake_redis
+
+
+@pytest.fixture
+def eager_celery():
+    """
+    Runs Celery tasks inline; exceptions propagate to the caller.
+    """
+    celery.conf.task_always_eager = True
+    celery.conf.task_eager_propagates = True
+    yield celery
+    celery.conf.task_always_eager = False
+    celery.conf.task_eager_propagates = False
+
+
+@pytest.fixture
+def api_statements():
+    """
+    SQL statements executed by the API's async engine while the test runs.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
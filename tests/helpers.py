@@ -0,0 +1,34 @@
+"""
+Plain helpers shared by the tests (fixtures live in conftest.py).
+"""
+import time
+
+PASSWORD = "correct horse"
+
+
+def log_entry(day, **values):
+    """
+    An import record for `day` (date or YYYY-MM-DD) with default metrics.
+    """
+    return {
+        "date": str(day),
+        "work_hours": 6,
+        "study_hours": 2,
+        "sleep_hours": 7,
+        "mood_score": 7,
+        "goal_completed_percentage": 80,
+        "notes": "",
+        **values,
+    }
+
+
+def wait_for(condition, timeout=5.0):
+    """
+    Polls condition() until it is true; False if it never was within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
@@ -0,0 +1,164 @@
+import math
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.aggregates import log_increments
+from app.analytics import (
+    generate_monthly_summaries,
+    generate_monthly_summary,
+    generate_monthly_summary_pandas,
+    summary_from_monthly_aggregate,
+)
+from tests.helpers import log_entry
+
+
+def daily_logs(count, seed=0, missing=False):
+    rng = random.Random(seed)
+    return [
+        {
+            "date": date(2024, 1, 1) + timedelta(days=i),
+            "work_hours": None if missing and i % 5 == 0 else round(rng.uniform(0, 12), 1),
+            "study_hours": round(rng.uniform(0, 6), 1),
+            "sleep_hours": round(rng.uniform(3, 10), 1),
+            "goal_completed": rng.uniform(0, 1),
+            "mood_score": rng.randint(1, 10),
+        }
+        for i in range(count)
+    ]
+
+
+def comparable(summary):
+    # NaN != NaN; compare missing averages as None
+    return {
+        key: None if isinstance(value, float) and math.isnan(value) else value
+        for key, value in summary.items()
+    }
+
+
+@pytest.mark.parametrize("count", [1, 6, 7, 8, 30, 31, 200])
+@pytest.mark.parametrize("missing", [False, True])
+def test_pure_python_summary_matches_pandas(count, missing):
+    logs = daily_logs(count, seed=count, missing=missing)
+    assert comparable(generate_monthly_summary(logs)) == comparable(
+        generate_monthly_summary_pandas(logs)
+    )
+
+
+def test_empty_month_has_no_summary():
+    assert generate_monthly_summary([]) is None
+
+
+def month_logs(work_by_day):
+    return [
+        {
+            "date": date(2024, 3, day),
+            "work_hours": work,
+            "study_hours": 2.0,
+            "sleep_hours": 7.0,
+            "goal_completed": 0.5,
+            "mood_score": 6,
+        }
+        for day, work in sorted(work_by_day.items())
+    ]
+
+
+def trends(logs):
+    """
+    work_trend of the same logs from every summary path.
+    """
+    aggregate = {}
+    for log in logs:
+        values = {**log, "goal_completed_percentage": log["goal_completed"]}
+        for column, value in log_increments(log["date"], values).items():
+            aggregate[column] = aggregate.get(column, 0) + value
+    batch = generate_monthly_summaries(
+        [1] * len(logs), [log["date"] for log in logs],
+        *[[log[key] for log in logs] for key in
+          ("work_hours", "study_hours", "sleep_hours", "goal_completed", "mood_score")],
+    )
+    return {
+        "pure": generate_monthly_summary(logs)["work_trend"],
+        "pandas": generate_monthly_summary_pandas(logs)["work_trend"],
+        "batch": batch[1]["work_trend"],
+        "aggregate": summary_from_monthly_aggregate(SimpleNamespace(**aggregate))["work_trend"],
+    }
+
+
+@pytest.mark.parametrize("work_by_day, expected", [
+    # Splitting the 20 logs at n // 2 would call this improving
+    ({**{d: 0.0 for d in range(1, 6)}, **{d: 10.0 for d in range(6, 16)},
+      **{d: 6.0 for d in range(16, 21)}}, "declining"),
+    ({**{d: 4.0 for d in range(1, 16)}, **{d: 5.0 for d in range(16, 21)}}, "improving"),
+    ({d: 8.0 for d in range(1, 11)}, "insufficient_data"),
+    ({d: 8.0 for d in range(20, 26)}, "insufficient_data"),
+])
+def test_every_summary_path_splits_the_month_at_day_15(work_by_day, expected):
+    assert set(trends(month_logs(work_by_day)).values()) == {expected}
+
+
+def test_monthly_job_queries_split_the_month_at_day_15(db):
+    from app.models import DailyLog, User
+    from app.tasks import aggregate_monthly_summaries, per_user_monthly_summaries
+
+    user = User(email="trend@example.com", name="trend")
+    db.add(user)
+    db.commit()
+    work_by_day = {**{d: 0.0 for d in range(1, 6)}, **{d: 10.0 for d in range(6, 16)},
+                   **{d: 6.0 for d in range(16, 21)}}
+    db.add_all([
+        DailyLog(
+            user_id=user.id, date=log["date"], work_hours=log["work_hours"],
+            study_hours=log["study_hours"], sleep_hours=log["sleep_hours"],
+            mood_score=log["mood_score"], goal_completed_percentage=log["goal_completed"],
+        )
+        for log in month_logs(work_by_day)
+    ])
+    db.commit()
+
+    assert aggregate_monthly_summaries(db, "2024-03")[user.id]["work_trend"] == "declining"
+    assert per_user_monthly_summaries(db, "2024-03")[user.id]["work_trend"] == "declining"
+
+
+@pytest.mark.parametrize("query", [
+    "from=9999-12-01&to=9999-12-31",
+    "from=2014-01-01&to=2024-12-31",
+    "from=2024-02-01&to=2024-01-01",
+])
+def test_range_rejects_bad_bounds(client, user, query):
+    _, headers = user
+    assert client.get(f"/analytics/range?{query}", headers=headers).status_code == 400
+
+
+def test_range_accepts_early_dates(client, user, import_logs):
+    _, headers = user
+    import_logs(client, headers, [log_entry(date(2024, 3, 1))])
+
+    early = client.get("/analytics/range?from=0001-01-01&to=0001-03-01", headers=headers)
+    assert early.status_code == 404
+    response = client.get("/analytics/range?from=2024-01-15&to=2024-03-31", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["days_logged"] == 1
+
+
+@pytest.mark.parametrize("query", [
+    "from=0001-01-01&to=0001-01-31&window=90",
+    "to=0001-01-05",
+])
+def test_rolling_clamps_windows_at_the_earliest_date(client, user, query):
+    _, headers = user
+    response = client.get(f"/analytics/rolling?{query}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["from"] == "0001-01-01"
+
+
+def test_rolling_window_covers_the_days_before_from(client, user, import_logs):
+    _, headers = user
+    import_logs(client, headers, [log_entry(date(2024, 3, 1), work_hours=4)])
+
+    response = client.get(
+        "/analytics/rolling?from=2024-03-07&to=2024-03-08&window=7", headers=headers
+    )
+    assert [point["days_logged"] for point in response.json()["points"]] == [1, 0]
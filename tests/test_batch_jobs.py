@@ -0,0 +1,198 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+import app.batch_jobs
+from app.batch_jobs import (
+    RunProgress,
+    batch_job_progress,
+    jobs,
+    register_batch_job,
+    start_batch_job,
+)
+from app.models import JobRun, User
+from tests.helpers import log_entry
+
+processed = []
+fail_shards = {}
+completed = []
+
+
+def process(db, lo, hi, tag):
+    if lo in fail_shards:
+        fail_shards[lo] -= 1
+        if fail_shards[lo] >= 0:
+            raise RuntimeError(f"shard {lo} is broken")
+    processed.append(lo)
+    return db.query(User).filter(User.id >= lo, User.id < hi).count()
+
+
+def on_complete(run_id, summary, tag):
+    completed.append((run_id, summary))
+
+
+@pytest.fixture
+def job(db, eager_celery, monkeypatch):
+    # Eager mode cannot replay a retry later, so shards give up on their
+    # first failure; rerunning the job stands in for the retry
+    monkeypatch.setattr(app.batch_jobs, "SHARD_MAX_RETRIES", 0)
+    db.add_all([User(email=f"user{i}@example.com", name=str(i)) for i in range(10)])
+    db.commit()
+    processed.clear()
+    fail_shards.clear()
+    completed.clear()
+    job = register_batch_job(
+        "test", process, shard_size=2, max_concurrent_shards=2, on_complete=on_complete
+    )
+    yield job
+    jobs.pop("test")
+
+
+def first_user_id(db):
+    return db.query(User.id).order_by(User.id).limit(1).scalar()
+
+
+def test_run_processes_every_shard(job, db):
+    start_batch_job("test", "run-1", tag="x")
+
+    start = first_user_id(db)
+    assert sorted(processed) == [start + offset for offset in range(0, 10, 2)]
+    progress = batch_job_progress("test", "run-1")
+    assert progress == {
+        "shards_total": 5, "shards_done": 5, "processed": 10,
+        "failed_shards": 0, "status": "finished",
+    }
+    assert completed == [("run-1", progress)]
+
+
+def test_exhausted_shard_still_completes_the_run(job, db):
+    start = first_user_id(db)
+    fail_shards[start + 4] = 1
+
+    start_batch_job("test", "run-1", tag="x")
+
+    progress = batch_job_progress("test", "run-1")
+    assert progress["status"] == "failed"
+    assert progress["failed_shards"] == 1
+    assert progress["shards_done"] == 4
+    assert completed and completed[0][1]["failed_shards"] == 1
+
+    finish = db.query(JobRun).filter(JobRun.task_name == "app.batch_jobs.finish_batch_job").one()
+    assert finish.failures == 1
+
+
+def test_rerun_resumes_unfinished_shards(job, db):
+    start = first_user_id(db)
+    fail_shards[start + 4] = 1
+    start_batch_job("test", "run-1", tag="x")
+    processed.clear()
+
+    start_batch_job("test", "run-1", tag="x")
+
+    assert processed == [start + 4]
+    progress = batch_job_progress("test", "run-1")
+    assert progress["shards_done"] == 5
+    assert progress["processed"] == 10
+    assert progress["status"] == "finished"
+
+
+def test_restart_discards_checkpoints(job, db):
+    start_batch_job("test", "run-1", tag="x")
+    processed.clear()
+
+    start_batch_job("test", "run-1", restart=True, tag="x")
+
+    assert len(processed) == 5
+    assert batch_job_progress("test", "run-1")["processed"] == 10
+
+
+def test_shard_counted_once_when_run_twice():
+    progress = RunProgress("test", "run-1")
+    progress.start(1)
+    progress.mark_done(1, 5)
+    progress.mark_done(1, 5)
+    assert progress.snapshot()["processed"] == 5
+
+
+def test_lanes_cap_concurrent_shards(job):
+    shards = [(lo, lo + 2) for lo in range(1, 11, 2)]
+    lanes = job.lanes(shards)
+    assert lanes == [[(1, 3), (5, 7), (9, 11)], [(3, 5), (7, 9)]]
+    assert job.lanes(shards[:1]) == [[(1, 3)]]
+    assert job.lanes([]) == []
+
+
+def test_rerun_of_finished_run_completes(job):
+    start_batch_job("test", "run-1", tag="x")
+    processed.clear()
+    completed.clear()
+
+    start_batch_job("test", "run-1", tag="x")
+
+    assert processed == []
+    assert batch_job_progress("test", "run-1")["status"] == "finished"
+
+
+def freeze_schedule_clock(monkeypatch, celery, utc):
+    import app.tasks
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return utc.astimezone(tz)
+
+    monkeypatch.setattr(app.tasks, "datetime", Clock)
+    monkeypatch.setattr(celery.conf, "timezone", "Asia/Kolkata")
+
+
+def test_daily_job_uses_the_schedule_timezone(eager_celery, monkeypatch):
+    import app.tasks
+
+    # 00:30 in Asia/Kolkata, still the previous day in UTC
+    freeze_schedule_clock(
+        monkeypatch, eager_celery, datetime(2024, 3, 4, 19, 0, tzinfo=timezone.utc)
+    )
+
+    app.tasks.daily_job.delay()
+
+    assert batch_job_progress("daily", "2024-03-05")["status"] == "finished"
+    assert app.tasks.reminder_day("2024-03-05") == date(2024, 3, 4)
+
+
+def test_backfill_fills_every_closed_month(client, user, import_logs, db, eager_celery):
+    from app.models import MonthlyAnalytics
+    from app.tasks import backfill_monthly_analytics
+
+    _, headers = user
+    import_logs(client, headers, [
+        log_entry(date(2024, month, day)) for month in (1, 3) for day in range(1, 9)
+    ])
+
+    backfill_monthly_analytics.delay()
+
+    rows = db.query(MonthlyAnalytics).order_by(MonthlyAnalytics.month).all()
+    assert [row.month for row in rows] == ["2024-01", "2024-03"]
+    assert all(row.partials and row.summary["total_days_logged"] == 8 for row in rows)
+
+
+def test_monthly_job_uses_the_schedule_timezone(
+    client, user, import_logs, db, eager_celery, monkeypatch
+):
+    from app.models import MonthlyAnalytics
+    from app.tasks import monthly_job
+
+    _, headers = user
+    import_logs(client, headers, [log_entry(date(2025, 5, day)) for day in range(1, 9)])
+    # 01:30 on June 1st in Asia/Kolkata, still May 31st in UTC
+    freeze_schedule_clock(
+        monkeypatch, eager_celery, datetime(2025, 5, 31, 20, 0, tzinfo=timezone.utc)
+    )
+
+    monthly_job.delay()
+
+    assert batch_job_progress("monthly", "2025-05")["status"] == "finished"
+    row = db.query(MonthlyAnalytics).one()
+    assert row.month == "2025-05"
+    assert row.summary["total_days_logged"] == 8
+    # May is closed by then, so its partials are stored too
+    assert row.partials["log_count"] == 8
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.import_time import DEFAULT_BUDGET_MS, ENTRY_MODULES, measure
+
+
+@pytest.mark.parametrize("module", ENTRY_MODULES)
+def test_import_within_budget(module):
+    ms, _ = measure(module, runs=3)
+    assert ms <= DEFAULT_BUDGET_MS, f"importing {module} took {ms:.0f}ms"
+
+
+@pytest.mark.parametrize("module", ENTRY_MODULES)
+def test_heavy_modules_stay_lazy(module):
+    _, loaded = measure(module, runs=1)
+    assert loaded == [], f"importing {module} loads {', '.join(loaded)}"
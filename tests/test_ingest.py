@@ -0,0 +1,183 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.aggregates import rebuild_monthly_aggregates
+from app.ingest import iter_lines, iter_records
+from app.models import MonthlyAnalytics, MonthlyLogAggregate
+from tests.helpers import log_entry
+
+NOTES = [
+    "plain",
+    "line one\nline two",
+    'said "hi", then left',
+    "trailing newline\n",
+    "windows\r\nbreak",
+    "",
+]
+
+
+def post_import(client, headers, body, content_type):
+    response = client.post(
+        "/daily-logs/import", content=body, headers={**headers, "Content-Type": content_type}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def logs_of(client, headers):
+    return [
+        {key: value for key, value in item.items() if key != "id"}
+        for item in client.get("/daily-logs/?limit=500", headers=headers).json()["items"]
+    ]
+
+
+def test_csv_export_round_trips(client, user, register, import_logs):
+    _, headers = user
+    start = date(2024, 1, 1)
+    import_logs(client, headers, [
+        log_entry(start + timedelta(days=i), notes=notes) for i, notes in enumerate(NOTES)
+    ])
+    exported = client.get("/daily-logs/export?format=csv", headers=headers).content
+
+    _, other = register(client, "other@example.com")
+    result = post_import(client, other, exported, "text/csv")
+
+    assert result == {"accepted": len(NOTES), "duplicates": 0, "rejected": 0, "errors": []}
+    assert logs_of(client, other) == logs_of(client, headers)
+    assert [log["notes"] for log in logs_of(client, other)] == NOTES
+
+
+def test_csv_record_spanning_chunks():
+    body = (
+        "date,work_hours,study_hours,sleep_hours,mood_score,goal_completed_percentage,notes\n"
+        '2024-02-01,1,2,7,5,50,"first\nsecond, with ""quotes"" and é"\n'
+    ).encode()
+
+    async def chunked():
+        # One byte at a time: splits lines, records and the é sequence
+        for i in range(len(body)):
+            yield body[i:i + 1]
+
+    async def collect():
+        return [record async for record in iter_records(iter_lines(chunked()), "csv")]
+
+    records = asyncio.run(collect())
+    assert records == [(1, {
+        "date": "2024-02-01", "work_hours": "1", "study_hours": "2", "sleep_hours": "7",
+        "mood_score": "5", "goal_completed_percentage": "50",
+        "notes": 'first\nsecond, with "quotes" and é',
+    })]
+
+
+def test_errors_are_reported_by_record(client, user):
+    _, headers = user
+    body = (
+        "date,work_hours,study_hours,sleep_hours,mood_score,goal_completed_percentage,notes\n"
+        '2024-02-01,1,2,7,5,50,"spans\ntwo lines"\n'
+        "\n"
+        "2024-02-02,1,2\n"
+        "2024-02-03,x,2,7,5,50,\n"
+        '2024-02-04,1,2,7,5,50,"never closed\n'
+    ).encode()
+
+    result = post_import(client, headers, body, "text/csv")
+
+    assert result["accepted"] == 1
+    assert result["rejected"] == 3
+    assert result["errors"][0] == "record 2: expected 7 columns, got 3"
+    assert result["errors"][1].startswith("record 3: work_hours")
+    assert result["errors"][2] == "record 4: unterminated quoted field"
+
+
+def test_ndjson_errors_are_reported_by_record(client, user):
+    _, headers = user
+    body = b'{"date": "2024-02-01", "work_hours": 1}\n\n{not json\n[1]\n'
+
+    result = post_import(client, headers, body, "application/x-ndjson")
+
+    assert result["accepted"] == 0
+    assert [error.split(":")[0] for error in result["errors"]] == ["record 1", "record 2", "record 3"]
+    assert result["errors"][2] == "record 3: expected a JSON object"
+
+
+def test_reimport_counts_duplicates(client, user, import_logs):
+    _, headers = user
+    entries = [log_entry(date(2024, 1, day)) for day in range(1, 11)]
+    import_logs(client, headers, entries)
+
+    result = import_logs(client, headers, entries + [entries[0]])
+
+    assert result["accepted"] == 0
+    assert result["duplicates"] == 11
+
+
+def aggregates(db):
+    columns = [c.name for c in MonthlyLogAggregate.__table__.c if c.name != "id"]
+    return sorted(
+        tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+        for row in db.query(*[getattr(MonthlyLogAggregate, column) for column in columns])
+    )
+
+
+def test_import_writes_aggregates_in_one_statement_per_chunk(
+    client, user, import_logs, api_statements, db
+):
+    user_id, headers = user
+    start = date(2021, 1, 1)
+    entries = [
+        log_entry(start + timedelta(days=i), work_hours=i % 11) for i in range(0, 3 * 365, 2)
+    ]
+    db.add_all([
+        MonthlyAnalytics(user_id=user_id, month=month, partials={"log_count": 1})
+        for month in ("2021-01", "2022-06", "2030-01")
+    ])
+    db.commit()
+
+    api_statements.clear()
+    import_logs(client, headers, entries)
+
+    writes = [s for s in api_statements if s.lstrip().upper().startswith(("INSERT", "UPDATE"))]
+    assert len([s for s in writes if "monthly_log_aggregates" in s]) == 1
+    assert len([s for s in writes if "monthly_analytics" in s]) == 1
+
+    before = aggregates(db)
+    rebuild_monthly_aggregates(db, user_id)
+    assert aggregates(db) == before
+    assert len(before) == 36
+
+    partials = dict(db.query(MonthlyAnalytics.month, MonthlyAnalytics.partials))
+    assert partials == {"2021-01": None, "2022-06": None, "2030-01": {"log_count": 1}}
+
+
+CSV_HEADER = "date,work_hours,study_hours,sleep_hours,mood_score,goal_completed_percentage,notes\n"
+
+
+def test_stray_quote_in_unquoted_field_is_literal(client, user):
+    _, headers = user
+    body = (
+        CSV_HEADER
+        + '2024-02-01,1,2,7,5,50,he said "hi\n'
+        + "2024-02-02,1,2,7,5,50,\n"
+        + "2024-02-03,1,2,7,5,50,\n"
+    ).encode()
+
+    result = post_import(client, headers, body, "text/csv")
+
+    assert result == {"accepted": 3, "duplicates": 0, "rejected": 0, "errors": []}
+    assert [log["notes"] for log in logs_of(client, headers)] == ['he said "hi', "", ""]
+
+
+def test_malformed_csv_record_is_rejected(client, user):
+    _, headers = user
+    body = (
+        CSV_HEADER
+        + "2024-02-01,1,2,7,5,50,\n"
+        + "2024-02-02,1,2,7,5,50,bare\rreturn\n"
+        + "2024-02-03,1,2,7,5,50,\n"
+    ).encode()
+
+    result = post_import(client, headers, body, "text/csv")
+
+    assert result["accepted"] == 2
+    assert result["rejected"] == 1
+    assert result["errors"][0].startswith("record 2: invalid CSV:")
@@ -0,0 +1,78 @@
+from datetime import date
+
+import pytest
+
+from app.database import async_engine
+from app.routers.logs import UPDATE_FROM_DIALECTS
+from app.token_cache import token_versions
+from benchmarks.query_counts import BUDGETS, FALLBACK_EXTRA, LOG
+from tests.helpers import wait_for
+
+
+def budget(name):
+    if async_engine.dialect.name in UPDATE_FROM_DIALECTS:
+        return BUDGETS[name]
+    return BUDGETS[name] + FALLBACK_EXTRA.get(name, 0)
+
+
+@pytest.fixture
+def headers(client, user):
+    _, headers = user
+    # Warm the token-version cache so auth costs no query
+    token_versions.ensure_listener()
+    assert wait_for(lambda: token_versions.subscribed)
+    client.get("/daily-logs/", headers=headers)
+    return headers
+
+
+def count(statements, send):
+    statements.clear()
+    response = send()
+    return response, len(statements)
+
+
+def test_create(client, headers, api_statements):
+    response, statements = count(
+        api_statements, lambda: client.post("/daily-logs/", json=LOG, headers=headers)
+    )
+    assert response.status_code == 200
+    assert statements <= budget("create")
+
+
+def test_duplicate_create(client, headers, api_statements):
+    client.post("/daily-logs/", json=LOG, headers=headers)
+    response, statements = count(
+        api_statements, lambda: client.post("/daily-logs/", json=LOG, headers=headers)
+    )
+    assert response.status_code == 400
+    assert statements <= budget("duplicate")
+
+
+def test_put(client, headers, api_statements):
+    client.post("/daily-logs/", json=LOG, headers=headers)
+    today = date.today().isoformat()
+    response, statements = count(api_statements, lambda: client.put(
+        f"/daily-logs/{today}", json={**LOG, "work_hours": 8}, headers=headers
+    ))
+    assert response.status_code == 200
+    assert response.json()["work_hours"] == 8
+    assert statements <= budget("put")
+
+
+def test_patch(client, headers, api_statements):
+    client.post("/daily-logs/", json=LOG, headers=headers)
+    today = date.today().isoformat()
+    response, statements = count(api_statements, lambda: client.patch(
+        f"/daily-logs/{today}", json={"mood_score": 9}, headers=headers
+    ))
+    assert response.status_code == 200
+    assert response.json()["mood_score"] == 9
+    assert statements <= budget("patch")
+
+
+def test_patch_missing(client, headers, api_statements):
+    response, statements = count(api_statements, lambda: client.patch(
+        "/daily-logs/1999-01-01", json={"mood_score": 9}, headers=headers
+    ))
+    assert response.status_code == 404
+    assert statements <= budget("patch_missing")
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app.routers.auth as auth_router
+from app.auth import REFRESH_TOKEN_EXPIRE_DAYS
+from app.models import RefreshToken
+from app.refresh_tokens import BACKENDS, KEY_PREFIX
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def store(request, monkeypatch):
+    backend = BACKENDS[request.param]()
+    monkeypatch.setattr(auth_router, "refresh_tokens", backend)
+    return backend
+
+
+def refresh_with(client, token):
+    client.cookies.clear()
+    return client.post("/auth/refresh", headers={"Cookie": f"refresh_token={token}"})
+
+
+def test_refresh_rotates_the_token(client, store, register):
+    register(client, "rotate@example.com")
+    first = client.cookies["refresh_token"]
+
+    response = client.post("/auth/refresh")
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+    second = client.cookies["refresh_token"]
+    assert second != first
+
+    assert refresh_with(client, second).status_code == 200
+
+
+def test_reused_refresh_token_is_rejected(client, store, register):
+    register(client, "reuse@example.com")
+    first = client.cookies["refresh_token"]
+
+    assert refresh_with(client, first).status_code == 200
+    response = refresh_with(client, first)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+
+def test_logout_revokes_the_refresh_token(client, store, register):
+    _, headers = register(client, "logout@example.com")
+    token = client.cookies["refresh_token"]
+
+    # The cookie is scoped to /auth/refresh, so send it to logout explicitly
+    logout = client.post(
+        "/auth/logout", headers={**headers, "Cookie": f"refresh_token={token}"}
+    )
+    assert logout.status_code == 200
+    assert refresh_with(client, token).status_code == 401
+
+
+def test_redis_tokens_expire_with_the_token(client, register, redis, monkeypatch):
+    monkeypatch.setattr(auth_router, "refresh_tokens", BACKENDS["redis"]())
+    register(client, "ttl@example.com")
+
+    keys = redis.keys(f"{KEY_PREFIX}*")
+    assert len(keys) == 1
+    ttl = redis.ttl(keys[0])
+    assert REFRESH_TOKEN_EXPIRE_DAYS * 86400 - 60 <= ttl <= REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def test_purge_removes_only_expired_rows(db, eager_celery):
+    from app.tasks import purge_expired_refresh_tokens
+
+    now = datetime.utcnow()
+    db.add_all(
+        [RefreshToken(token_hash=f"expired-{i}", user_id=1, expires_at=now - timedelta(hours=1))
+         for i in range(5)]
+        + [RefreshToken(token_hash="valid", user_id=1, expires_at=now + timedelta(hours=1))]
+    )
+    db.commit()
+
+    assert purge_expired_refresh_tokens.delay(batch_size=2).get() == 5
+    assert [token.token_hash for token in db.query(RefreshToken)] == ["valid"]
@@ -0,0 +1,91 @@
+from datetime import date
+
+from app.response_cache import etag_matches
+from tests.helpers import log_entry
+
+MONTH = "2024-03"
+
+
+def month_logs():
+    return [log_entry(date(2024, 3, day), work_hours=day % 9) for day in range(1, 21)]
+
+
+def analytics_reads(statements):
+    return [s for s in statements if "daily_logs" in s or "monthly_analytics" in s]
+
+
+def test_unchanged_data_is_answered_with_304(client, user, import_logs, api_statements):
+    _, headers = user
+    import_logs(client, headers, month_logs())
+
+    first = client.get(f"/analytics/monthly/{MONTH}", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    api_statements.clear()
+    revalidated = client.get(
+        f"/analytics/monthly/{MONTH}", headers={**headers, "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert analytics_reads(api_statements) == []
+
+
+def test_cached_body_is_served_from_redis(client, user, import_logs, api_statements):
+    _, headers = user
+    import_logs(client, headers, month_logs())
+    first = client.get(f"/analytics/monthly/{MONTH}", headers=headers)
+
+    api_statements.clear()
+    second = client.get(f"/analytics/monthly/{MONTH}", headers=headers)
+    assert second.content == first.content
+    assert analytics_reads(api_statements) == []
+
+
+def test_new_log_changes_the_etag(client, user, import_logs):
+    _, headers = user
+    import_logs(client, headers, month_logs())
+    etag = client.get(f"/analytics/monthly/{MONTH}", headers=headers).headers["ETag"]
+
+    import_logs(client, headers, [log_entry(date(2024, 3, 25), work_hours=11)])
+
+    response = client.get(
+        f"/analytics/monthly/{MONTH}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["days_logged"] == 21
+    assert response.json()["summary"]["total_days_logged"] == 21
+
+
+def test_monthly_job_changes_the_etag(client, user, import_logs, eager_celery):
+    from app.tasks import monthly_job
+
+    _, headers = user
+    import_logs(client, headers, month_logs())
+    etag = client.get(f"/analytics/monthly/{MONTH}", headers=headers).headers["ETag"]
+
+    monthly_job.delay(month=MONTH)
+
+    response = client.get(
+        f"/analytics/monthly/{MONTH}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_caches_are_per_user(client, user, register, import_logs):
+    _, headers = user
+    import_logs(client, headers, month_logs())
+    etag = client.get(f"/analytics/monthly/{MONTH}", headers=headers).headers["ETag"]
+
+    _, other = register(client, "other@example.com")
+    response = client.get(f"/analytics/monthly/{MONTH}", headers={**other, "If-None-Match": etag})
+    assert response.status_code == 404
+
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+
+from app.models import User
+from app.rollups import compute_daily_rollups, refresh_daily_rollups
+from tests.helpers import PASSWORD
+
+
+def test_registered_users_counts_accounts_as_of_each_day(db):
+    db.add_all([
+        User(email="old@example.com", name="old"),  # before created_at existed
+        User(email="a@example.com", name="a", created_at=datetime(2024, 3, 1, 10)),
+        User(email="b@example.com", name="b", created_at=datetime(2024, 3, 3, 23, 59)),
+        User(email="c@example.com", name="c", created_at=datetime(2024, 3, 4)),
+    ])
+    db.commit()
+
+    rollups = compute_daily_rollups(db, [date(2024, 3, day) for day in (4, 1, 2, 3)])
+
+    assert [(r["day"].day, r["registered_users"]) for r in rollups] == [
+        (1, 2), (2, 2), (3, 3), (4, 4),
+    ]
+
+
+def test_refresh_without_days_writes_nothing(db):
+    assert refresh_daily_rollups(db, []) == []
+
+
+def test_registration_records_created_at(client, db):
+    client.post(
+        "/auth/register",
+        json={"email": "new@example.com", "name": "new", "password": PASSWORD},
+    )
+    user = db.query(User).filter(User.email == "new@example.com").one()
+    assert user.created_at is not None
@@ -0,0 +1,58 @@
+from app.token_cache import TokenVersionCache, publish_token_invalidation, token_versions
+from tests.helpers import wait_for
+
+
+def subscribed(cache):
+    cache.ensure_listener()
+    assert wait_for(lambda: cache.subscribed), "invalidation listener never subscribed"
+    return cache
+
+
+def test_authenticated_requests_hit_the_cache(client, user, api_statements):
+    _, headers = user
+    subscribed(token_versions)
+
+    client.get("/daily-logs/", headers=headers)
+    hits = token_versions.hits
+    api_statements.clear()
+
+    assert client.get("/daily-logs/", headers=headers).status_code == 200
+    assert token_versions.hits == hits + 1
+    assert not any("FROM users" in statement for statement in api_statements)
+
+
+def test_logout_revokes_cached_token(client, user):
+    _, headers = user
+    subscribed(token_versions)
+    client.get("/daily-logs/", headers=headers)
+
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/daily-logs/", headers=headers).status_code == 401
+
+
+def test_invalidation_reaches_other_workers():
+    other_worker = subscribed(TokenVersionCache())
+    _, generation = other_worker.get(42)
+    other_worker.set(42, 3, generation)
+    assert other_worker.get(42)[0] == 3
+
+    publish_token_invalidation(42)
+
+    assert wait_for(lambda: other_worker.get(42)[0] is None)
+    assert other_worker.invalidations == 1
+
+
+def test_unsubscribed_cache_never_serves():
+    cache = TokenVersionCache()
+    cache._listener = object()  # pretend a listener exists but never subscribed
+    cache.set(1, 1, cache.get(1)[1])
+    assert cache.get(1)[0] is None
+
+
+def test_stale_read_is_not_cached_after_invalidation():
+    cache = subscribed(TokenVersionCache())
+    _, generation = cache.get(7)
+    # A logout lands between the DB read and set()
+    cache.invalidate(7)
+    cache.set(7, 1, generation)
+    assert cache.get(7)[0] is None